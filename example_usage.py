@@ -4,13 +4,8 @@
 Демонстрирует различные способы использования агрегатора
 """
 
-import sys
-import os
 from datetime import datetime
 
-# Добавляем текущую директорию в путь для импортов
-sys.path.append(os.path.dirname(os.path.abspath(__file__)))
-
 from main import AINewsAggregator
 from utils.config import Config, setup_logging
 from utils.filters import NewsFilter
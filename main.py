@@ -4,139 +4,147 @@ AI News Aggregator - Основной файл
 Собирает новости об ИИ из различных источников и отправляет в Telegram
 """
 
+import heapq
+import importlib
 import logging
-import os
 import sys
-from datetime import datetime
-from typing import List, Dict, Any
-
-# Добавляем текущую директорию в путь для импортов
-sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, NamedTuple
 
 from utils.config import Config, setup_logging
 from utils.filters import NewsFilter
 from utils.telegram_sender import TelegramSender
-from sources.youtube_parser import YouTubeParser
-from sources.twitter_parser import TwitterParser
-from sources.google_news_parser import GoogleNewsParser
-from sources.hackernews_parser import HackerNewsParser
-from sources.reddit_parser import RedditParser
+from utils.http_session import create_http_session
+from utils.cache import NewsCache
+from utils.bloom import SeenUrls
+from utils.dispatcher import MemoryAdaptiveDispatcher
+
+class ParserSpec(NamedTuple):
+    """Описание источника новостей для реестра парсеров"""
+    name: str
+    display_name: str
+    enable_flag: str
+    module: str
+    class_name: str
+    fetch_method: str
+    max_results: int
+    uses_http_session: bool
 
 class AINewsAggregator:
     """Основной класс агрегатора новостей об ИИ"""
     
+    # Реестр источников; модули парсеров импортируются только для включенных источников
+    PARSER_REGISTRY = [
+        ParserSpec('youtube', 'YouTube', 'ENABLE_YOUTUBE', 'sources.youtube_parser', 'YouTubeParser', 'search_videos', 50, False),
+        ParserSpec('twitter', 'Twitter', 'ENABLE_TWITTER', 'sources.twitter_parser', 'TwitterParser', 'search_tweets', 60, False),
+        ParserSpec('google_news', 'Google News', 'ENABLE_GOOGLE_NEWS', 'sources.google_news_parser', 'GoogleNewsParser', 'search_news', 60, True),
+        ParserSpec('hackernews', 'Hacker News', 'ENABLE_HACKERNEWS', 'sources.hackernews_parser', 'HackerNewsParser', 'search_stories', 50, True),
+        ParserSpec('reddit', 'Reddit', 'ENABLE_REDDIT', 'sources.reddit_parser', 'RedditParser', 'search_posts', 50, True)
+    ]
+    
+    # Адреса для прогрева соединений источников, использующих общую HTTP сессию
+    WARMUP_URLS = {
+        'google_news': 'https://news.google.com/',
+        'hackernews': 'https://hacker-news.firebaseio.com/v0/maxitem.json',
+        'reddit': 'https://oauth.reddit.com/'
+    }
+    
     def __init__(self):
         self.config = Config()
         self.filter = NewsFilter()
         self.telegram_sender = TelegramSender()
         self.logger = logging.getLogger(__name__)
         
+        # Общая HTTP сессия для парсеров: соединения и TLS сессии переиспользуются
+        self.http = create_http_session(pool_connections=20, pool_maxsize=10)
+        
+        # Кэш результатов парсеров между запусками
+        self.cache = None
+        if self.config.ENABLE_CACHE:
+            self.cache = NewsCache(
+                cache_dir=self.config.CACHE_DIR,
+                ttl=self.config.CACHE_TTL,
+                stale_ttl=self.config.CACHE_STALE_TTL
+            )
+        
+        # URL новостей, уже отправленных в прошлых дайджестах
+        self.seen_urls = None
+        if self.config.ENABLE_SEEN_URLS:
+            self.seen_urls = SeenUrls(self.config.SEEN_URLS_FILE)
+        
+        # Ограничивает параллельный сбор новостей на хостах с малым объемом памяти
+        self.dispatcher = MemoryAdaptiveDispatcher(
+            max_concurrency=self.config.MAX_CONCURRENT_SOURCES,
+            memory_threshold_mb=self.config.MEMORY_LIMIT_MB
+        )
+        
         # Инициализируем парсеры
         self.parsers = {}
         self._initialize_parsers()
     
     def _initialize_parsers(self):
         """Инициализирует парсеры для доступных источников"""
-        try:
-            if self.config.ENABLE_YOUTUBE:
-                self.parsers['youtube'] = YouTubeParser()
-                self.logger.info("YouTube парсер инициализирован")
-        except Exception as e:
-            self.logger.error(f"Ошибка инициализации YouTube парсера: {e}")
+        for spec in self.PARSER_REGISTRY:
+            try:
+                if not getattr(self.config, spec.enable_flag):
+                    continue
+                
+                module = importlib.import_module(spec.module)
+                parser_class = getattr(module, spec.class_name)
+                # Все парсеры используют общий фильтр с уже подготовленными таблицами ключевых слов
+                kwargs = {'news_filter': self.filter}
+                if spec.uses_http_session:
+                    kwargs['session'] = self.http
+                
+                self.parsers[spec.name] = parser_class(**kwargs)
+                self.logger.info(f"{spec.display_name} парсер инициализирован")
+            except Exception as e:
+                self.logger.error(f"Ошибка инициализации {spec.display_name} парсера: {e}")
+    
+    def prewarm(self):
+        """Заранее открывает соединения с источниками
         
-        try:
-            if self.config.ENABLE_TWITTER:
-                self.parsers['twitter'] = TwitterParser()
-                self.logger.info("Twitter парсер инициализирован")
-        except Exception as e:
-            self.logger.error(f"Ошибка инициализации Twitter парсера: {e}")
+        Выполняет DNS запросы и TLS рукопожатия до первого запуска,
+        соединения остаются в пуле общей HTTP сессии.
+        """
+        urls = [url for name, url in self.WARMUP_URLS.items() if name in self.parsers]
         
-        try:
-            if self.config.ENABLE_GOOGLE_NEWS:
-                self.parsers['google_news'] = GoogleNewsParser()
-                self.logger.info("Google News парсер инициализирован")
-        except Exception as e:
-            self.logger.error(f"Ошибка инициализации Google News парсера: {e}")
+        def warmup(url):
+            try:
+                self.http.head(url, timeout=5)
+            except Exception as e:
+                self.logger.warning(f"Не удалось прогреть соединение с {url}: {e}")
         
-        try:
-            if self.config.ENABLE_HACKERNEWS:
-                self.parsers['hackernews'] = HackerNewsParser()
-                self.logger.info("Hacker News парсер инициализирован")
-        except Exception as e:
-            self.logger.error(f"Ошибка инициализации Hacker News парсера: {e}")
+        with ThreadPoolExecutor(max_workers=max(len(urls), 1)) as executor:
+            list(executor.map(warmup, urls))
         
-        try:
-            if self.config.ENABLE_REDDIT:
-                self.parsers['reddit'] = RedditParser()
-                self.logger.info("Reddit парсер инициализирован")
-        except Exception as e:
-            self.logger.error(f"Ошибка инициализации Reddit парсера: {e}")
+        self.logger.info(f"Прогрето соединений: {len(urls)}")
     
     def collect_news(self) -> List[Dict[str, Any]]:
-        """Собирает новости из всех доступных источников"""
+        """Собирает новости из всех доступных источников параллельно"""
         all_news = []
         sources_used = []
         errors = []
         
         self.logger.info("Начинаем сбор новостей...")
         
-        # YouTube
-        if 'youtube' in self.parsers:
-            try:
-                youtube_news = self.parsers['youtube'].search_videos(max_results=50)
-                all_news.extend(youtube_news)
-                sources_used.append('YouTube')
-                self.logger.info(f"YouTube: найдено {len(youtube_news)} новостей")
-            except Exception as e:
-                error_msg = f"YouTube: {str(e)}"
-                errors.append(error_msg)
-                self.logger.error(error_msg)
-        
-        # Twitter
-        if 'twitter' in self.parsers:
-            try:
-                twitter_news = self.parsers['twitter'].search_tweets(max_results=60)
-                all_news.extend(twitter_news)
-                sources_used.append('Twitter')
-                self.logger.info(f"Twitter: найдено {len(twitter_news)} новостей")
-            except Exception as e:
-                error_msg = f"Twitter: {str(e)}"
-                errors.append(error_msg)
-                self.logger.error(error_msg)
+        active_specs = [spec for spec in self.PARSER_REGISTRY if spec.name in self.parsers]
         
-        # Google News
-        if 'google_news' in self.parsers:
-            try:
-                google_news = self.parsers['google_news'].search_news(max_results=60)
-                all_news.extend(google_news)
-                sources_used.append('Google News')
-                self.logger.info(f"Google News: найдено {len(google_news)} новостей")
-            except Exception as e:
-                error_msg = f"Google News: {str(e)}"
-                errors.append(error_msg)
-                self.logger.error(error_msg)
+        # Запросы к источникам упираются в сеть, поэтому выполняем их одновременно
+        futures = self.dispatcher.run_many({
+            spec.name: (lambda spec=spec: self._fetch_source(spec))
+            for spec in active_specs
+        })
         
-        # Hacker News
-        if 'hackernews' in self.parsers:
+        # Собираем результаты в исходном порядке источников
+        for spec in active_specs:
             try:
-                hackernews_news = self.parsers['hackernews'].search_stories(max_results=50)
-                all_news.extend(hackernews_news)
-                sources_used.append('Hacker News')
-                self.logger.info(f"Hacker News: найдено {len(hackernews_news)} новостей")
+                source_news = futures[spec.name].result()
+                all_news.extend(source_news)
+                sources_used.append(spec.display_name)
+                self.logger.info(f"{spec.display_name}: найдено {len(source_news)} новостей")
             except Exception as e:
-                error_msg = f"Hacker News: {str(e)}"
-                errors.append(error_msg)
-                self.logger.error(error_msg)
-        
-        # Reddit
-        if 'reddit' in self.parsers:
-            try:
-                reddit_news = self.parsers['reddit'].search_posts(max_results=50)
-                all_news.extend(reddit_news)
-                sources_used.append('Reddit')
-                self.logger.info(f"Reddit: найдено {len(reddit_news)} новостей")
-            except Exception as e:
-                error_msg = f"Reddit: {str(e)}"
+                error_msg = f"{spec.display_name}: {str(e)}"
                 errors.append(error_msg)
                 self.logger.error(error_msg)
         
@@ -144,21 +152,38 @@ class AINewsAggregator:
         
         return all_news, sources_used, errors
     
+    def _fetch_source(self, spec: ParserSpec) -> List[Dict[str, Any]]:
+        """Запрашивает новости у парсера, используя кэш при наличии"""
+        fetch = lambda: getattr(self.parsers[spec.name], spec.fetch_method)(max_results=spec.max_results)
+        
+        if self.cache is None:
+            return fetch()
+        
+        return self.cache.get_or_fetch(f"{spec.name}:{spec.max_results}", fetch)
+    
     def process_news(self, news_list: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """Обрабатывает собранные новости"""
         self.logger.info("Обрабатываем собранные новости...")
         
-        # Удаляем дубликаты
-        unique_news = self.filter.remove_duplicates(news_list)
-        self.logger.info(f"После удаления дубликатов: {len(unique_news)} новостей")
+        # Удаляем дубликаты и фильтруем по релевантности
+        relevant_news = self.filter.deduplicate_and_filter(news_list, min_score=10)
+        self.logger.info(f"После удаления дубликатов и фильтрации по релевантности: {len(relevant_news)} новостей")
+        
+        # Отбрасываем новости, которые уже были в прошлых дайджестах
+        if self.seen_urls is not None:
+            relevant_news = [news for news in relevant_news if news['url'] not in self.seen_urls]
+            self.logger.info(f"После исключения отправленных ранее: {len(relevant_news)} новостей")
         
-        # Фильтруем по релевантности
-        relevant_news = self.filter.filter_news_by_relevance(unique_news, min_score=10)
-        self.logger.info(f"После фильтрации по релевантности: {len(relevant_news)} новостей")
+        # Сортируем по времени публикации (целое число секунд, заполняется парсерами;
+        # в записях кэша, сохраненных до появления поля, его нет);
+        # если размер дайджеста ограничен, выбираем только самые свежие новости без полной сортировки
+        sort_key = lambda news: news.get('published_ts', 0)
+        limit = self.config.MAX_DIGEST_ITEMS
         
-        # Сортируем по дате публикации
-        relevant_news.sort(key=lambda x: x.get('published_date', datetime.min), reverse=True)
+        if 0 < limit < len(relevant_news):
+            return heapq.nlargest(limit, relevant_news, key=sort_key)
         
+        relevant_news.sort(key=sort_key, reverse=True)
         return relevant_news
     
     def send_news_digest(self, news_list: List[Dict[str, Any]], sources_used: List[str], errors: List[str]):
@@ -177,6 +202,11 @@ class AINewsAggregator:
             
             if success:
                 self.logger.info("Дайджест новостей успешно отправлен в Telegram")
+                if self.seen_urls is not None:
+                    self.seen_urls.add_many(news['url'] for news in news_list)
+                # Twitter продолжит поиск с доставленных твитов только после успешной отправки
+                if 'twitter' in self.parsers:
+                    self.parsers['twitter'].save_state(news_list)
             else:
                 self.logger.error("Ошибка при отправке дайджеста в Telegram")
             
@@ -215,32 +245,37 @@ class AINewsAggregator:
             self.logger.error(f"Критическая ошибка в AI News Aggregator: {e}")
             self.telegram_sender.send_error_message(str(e))
     
+    def close(self):
+        """Освобождает сетевые ресурсы агрегатора"""
+        if self.cache is not None:
+            self.cache.close()
+        self.http.close()
+    
     def test_sources(self):
         """Тестирует доступность источников"""
         self.logger.info("Тестирование источников...")
         
-        for source_name, parser in self.parsers.items():
-            try:
-                if source_name == 'youtube':
-                    test_news = parser.search_videos(max_results=1)
-                elif source_name == 'twitter':
-                    test_news = parser.search_tweets(max_results=1)
-                elif source_name == 'google_news':
-                    test_news = parser.search_news(max_results=1)
-                elif source_name == 'hackernews':
-                    test_news = parser.search_stories(max_results=1)
-                elif source_name == 'reddit':
-                    test_news = parser.search_posts(max_results=1)
-                
-                self.logger.info(f"✅ {source_name}: OK")
-                
-            except Exception as e:
-                self.logger.error(f"❌ {source_name}: {e}")
+        active_specs = [spec for spec in self.PARSER_REGISTRY if spec.name in self.parsers]
+        
+        # Проверяем все источники одновременно, результаты выводим в исходном порядке
+        with ThreadPoolExecutor(max_workers=max(len(active_specs), 1)) as executor:
+            futures = {
+                spec.name: executor.submit(getattr(self.parsers[spec.name], spec.fetch_method), max_results=1)
+                for spec in active_specs
+            }
+            
+            for spec in active_specs:
+                try:
+                    futures[spec.name].result()
+                    self.logger.info(f"✅ {spec.name}: OK")
+                except Exception as e:
+                    self.logger.error(f"❌ {spec.name}: {e}")
 
 def main():
     """Точка входа в программу"""
     # Настраиваем логирование
     logger = setup_logging()
+    aggregator = None
     
     try:
         # Создаем агрегатор
@@ -259,6 +294,9 @@ def main():
     except Exception as e:
         logger.error(f"Критическая ошибка: {e}")
         sys.exit(1)
+    finally:
+        if aggregator is not None:
+            aggregator.close()
 
 if __name__ == "__main__":
     main()
@@ -4,25 +4,31 @@
 Запускает агрегатор по расписанию
 """
 
-import schedule
 import time
 import logging
 import sys
-import os
-from datetime import datetime
-
-# Добавляем текущую директорию в путь для импортов
-sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from datetime import datetime, time as dt_time, timedelta
 
 from main import AINewsAggregator
 from utils.config import setup_logging
 
 class NewsScheduler:
-    """Планировщик для автоматического запуска агрегатора"""
+    """Планировщик для автоматического запуска агрегатора
+    
+    Использует один экземпляр AINewsAggregator на все запуски:
+    парсеры, HTTP сессия и кэш создаются один раз при старте.
+    """
+    
+    # Ежедневное время запуска (локальное время)
+    RUN_TIMES = [dt_time(9, 0), dt_time(18, 0)]
+    
+    # Как часто сверяться с часами во время ожидания (секунды)
+    MAX_SLEEP_SECONDS = 900
     
     def __init__(self):
         self.logger = logging.getLogger(__name__)
         self.aggregator = AINewsAggregator()
+        self.aggregator.prewarm()
     
     def run_aggregator(self):
         """Запускает агрегатор новостей"""
@@ -33,19 +39,32 @@ class NewsScheduler:
             self.logger.error(f"Ошибка при запуске агрегатора: {e}")
     
     def setup_schedule(self):
-        """Настраивает расписание запуска"""
-        # Ежедневно в 9:00
-        schedule.every().day.at("09:00").do(self.run_aggregator)
-        
-        # Ежедневно в 18:00
-        schedule.every().day.at("18:00").do(self.run_aggregator)
-        
-        # Каждые 6 часов (для тестирования)
-        # schedule.every(6).hours.do(self.run_aggregator)
-        
+        """Выводит настроенное расписание запуска"""
         self.logger.info("Расписание настроено:")
-        self.logger.info("- Ежедневно в 09:00")
-        self.logger.info("- Ежедневно в 18:00")
+        for run_time in self.RUN_TIMES:
+            self.logger.info(f"- Ежедневно в {run_time.strftime('%H:%M')}")
+    
+    def next_run_time(self, now: datetime) -> datetime:
+        """Возвращает ближайшее время запуска после now"""
+        candidates = [
+            datetime.combine(now.date() + timedelta(days=day_offset), run_time)
+            for day_offset in (0, 1)
+            for run_time in self.RUN_TIMES
+        ]
+        return min(candidate for candidate in candidates if candidate > now)
+    
+    def sleep_until(self, target: datetime):
+        """Спит до наступления target
+        
+        Длинное ожидание разбивается на отрезки не длиннее MAX_SLEEP_SECONDS:
+        time.sleep не учитывает время в спящем режиме системы и перевод часов,
+        поэтому после каждого отрезка остаток пересчитывается по текущему времени.
+        """
+        while True:
+            remaining = (target - datetime.now()).total_seconds()
+            if remaining <= 0:
+                return
+            time.sleep(min(remaining, self.MAX_SLEEP_SECONDS))
     
     def run(self):
         """Запускает планировщик"""
@@ -58,14 +77,18 @@ class NewsScheduler:
         self.logger.info("Запуск агрегатора для тестирования...")
         self.run_aggregator()
         
-        # Основной цикл планировщика
+        # Основной цикл планировщика: спим до ближайшего запуска, а не опрашиваем каждую минуту
         self.logger.info("Планировщик запущен. Ожидание задач...")
         while True:
             try:
-                schedule.run_pending()
-                time.sleep(60)  # Проверяем каждую минуту
+                next_run = self.next_run_time(datetime.now())
+                self.logger.info(f"Следующий запуск: {next_run}")
+                
+                self.sleep_until(next_run)
+                self.run_aggregator()
             except KeyboardInterrupt:
                 self.logger.info("Планировщик остановлен пользователем")
+                self.aggregator.close()
                 break
             except Exception as e:
                 self.logger.error(f"Ошибка в планировщике: {e}")
@@ -1,39 +1,85 @@
 import logging
-from datetime import datetime, timedelta
+import itertools
+import re
+import xml.etree.ElementTree as ElementTree
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
 from typing import List, Dict, Any
 import feedparser
 import requests
+from email.utils import parsedate_to_datetime
 from urllib.parse import quote_plus
 from utils.config import Config
 from utils.filters import NewsFilter
+from utils.http_session import create_http_session
+
+# Названия известных источников по домену
+_KNOWN_SOURCES = {
+    'cnn.com': 'CNN',
+    'bbc.com': 'BBC',
+    'reuters.com': 'Reuters',
+    'ap.org': 'Associated Press',
+    'bloomberg.com': 'Bloomberg',
+    'techcrunch.com': 'TechCrunch',
+    'theverge.com': 'The Verge',
+    'wired.com': 'Wired',
+    'arstechnica.com': 'Ars Technica',
+    'engadget.com': 'Engadget'
+}
+
+# Хост без протокола, www и порта
+_DOMAIN_RE = re.compile(r'(?:https?://)?(?:www\.)?([^/?#:]*)', re.IGNORECASE)
 
 class GoogleNewsParser:
     """Парсер для Google News с использованием RSS фидов"""
     
-    def __init__(self):
+    # Регионы, фиды которых опрашиваются для каждого ключевого слова
+    REGIONS = ['US', 'GB', 'CA', 'AU']
+    # Шаблоны URL поиска по регионам, в них подставляется только закодированный запрос
+    SEARCH_URL_TEMPLATES = {
+        region: f"https://news.google.com/rss/search?q={{query}}&hl=en-{region}&gl={region}&ceid={region}:en"
+        for region in REGIONS
+    }
+    # Сколько RSS фидов загружать одновременно
+    MAX_WORKERS = 8
+    
+    def __init__(self, session: requests.Session = None, news_filter: NewsFilter = None):
         self.config = Config()
-        self.filter = NewsFilter()
+        self.filter = news_filter if news_filter is not None else NewsFilter()
         self.logger = logging.getLogger(__name__)
+        self.session = session if session is not None else create_http_session(pool_maxsize=self.MAX_WORKERS)
     
     def search_news(self, max_results: int = 50) -> List[Dict[str, Any]]:
         """Поиск новостей по ключевым словам"""
-        news_items = []
-        
         try:
-            # Поиск по каждому ключевому слову
-            for keyword in self.config.AI_KEYWORDS[:8]:  # Ограничиваем количество запросов
-                try:
-                    keyword_news = self._search_by_keyword(keyword, max_results // len(self.config.AI_KEYWORDS[:8]))
-                    news_items.extend(keyword_news)
-                    
-                    self.logger.info(f"Найдено {len(keyword_news)} новостей для ключевого слова: {keyword}")
-                    
-                except Exception as e:
-                    self.logger.error(f"Ошибка при поиске новостей для '{keyword}': {e}")
-                    continue
-            
-            # Удаляем дубликаты
-            news_items = self.filter.remove_duplicates(news_items)
+            keywords = self.config.AI_KEYWORDS[:8]  # Ограничиваем количество запросов
+            per_keyword = max_results // len(keywords)
+            
+            # Фиды по всем ключевым словам и регионам загружаем одновременно,
+            # размер пула ограничивает число одновременных запросов к Google News
+            with ThreadPoolExecutor(max_workers=self.MAX_WORKERS) as executor:
+                futures = [
+                    (keyword, executor.submit(self._search_region, region, rss_url, per_keyword))
+                    for keyword in keywords
+                    for region, rss_url in self._search_urls(keyword).items()
+                ]
+                
+                # Собираем результаты в исходном порядке ключевых слов и регионов
+                results = []
+                keyword_counts = {}
+                for keyword, future in futures:
+                    try:
+                        region_news = future.result()
+                        results.append(region_news)
+                        keyword_counts[keyword] = keyword_counts.get(keyword, 0) + len(region_news)
+                    except Exception as e:
+                        self.logger.error(f"Ошибка при поиске новостей для '{keyword}': {e}")
+            
+            for keyword, count in keyword_counts.items():
+                self.logger.info(f"Найдено {count} новостей для ключевого слова: {keyword}")
+            
+            # Удаляем дубликаты сразу по результатам регионов, без промежуточного общего списка
+            news_items = self.filter.remove_duplicates(itertools.chain.from_iterable(results))
             
             self.logger.info(f"Всего найдено уникальных новостей: {len(news_items)}")
             return news_items
@@ -42,78 +88,82 @@ class GoogleNewsParser:
             self.logger.error(f"Ошибка при поиске новостей: {e}")
             return []
     
-    def _search_by_keyword(self, keyword: str, max_results: int = 10) -> List[Dict[str, Any]]:
-        """Поиск новостей по конкретному ключевому слову"""
+    def _search_urls(self, keyword: str) -> Dict[str, str]:
+        """Возвращает URL RSS фидов поиска по ключевому слову для всех регионов"""
+        # Кодируем ключевое слово один раз для всех регионов
+        encoded_keyword = quote_plus(keyword)
+        return {region: template.format(query=encoded_keyword) for region, template in self.SEARCH_URL_TEMPLATES.items()}
+    
+    def _search_region(self, region: str, rss_url: str, max_results: int = 10) -> List[Dict[str, Any]]:
+        """Поиск новостей в RSS фиде поиска одного региона"""
         news_items = []
         
         try:
-            # Формируем URL для RSS фида Google News
-            # Используем разные регионы для получения большего количества новостей
-            regions = ['US', 'GB', 'CA', 'AU']
-            
-            for region in regions:
-                try:
-                    # URL для RSS фида Google News (кодируем ключевое слово)
-                    encoded_keyword = quote_plus(keyword)
-                    rss_url = f"https://news.google.com/rss/search?q={encoded_keyword}&hl=en-{region}&gl={region}&ceid={region}:en"
-                    
-                    # Парсим RSS фид
-                    feed = feedparser.parse(rss_url)
-                    
-                    if feed.bozo:
-                        self.logger.warning(f"RSS фид содержит ошибки для региона {region}: {feed.bozo_exception}")
-                        continue
-                    
-                    count = 0
-                    for entry in feed.entries:
-                        if count >= max_results:
-                            break
-                        
-                        news_data = self._extract_news_data(entry)
-                        if news_data and self._is_valid_news(news_data):
-                            news_items.append(news_data)
-                            count += 1
-                    
-                    self.logger.info(f"Найдено {count} новостей для региона {region}")
-                    
-                except Exception as e:
-                    self.logger.error(f"Ошибка при парсинге RSS для региона {region}: {e}")
-                    continue
+            # Парсим RSS фид
+            feed = self._fetch_feed(rss_url)
             
+            if feed.bozo:
+                self.logger.warning(f"RSS фид содержит ошибки для региона {region}: {feed.bozo_exception}")
+                return []
+            
+            for entry in feed.entries:
+                if len(news_items) >= max_results:
+                    break
+                
+                news_data = self._extract_news_data(entry)
+                if news_data:
+                    news_items.append(news_data)
+            
+            self.logger.info(f"Найдено {len(news_items)} новостей для региона {region}")
             return news_items
             
         except Exception as e:
-            self.logger.error(f"Ошибка при поиске новостей по ключевому слову '{keyword}': {e}")
+            self.logger.error(f"Ошибка при парсинге RSS для региона {region}: {e}")
             return []
     
+    def _fetch_feed(self, rss_url: str):
+        """Загружает RSS фид через общую HTTP сессию и парсит его"""
+        response = self.session.get(rss_url, timeout=10)
+        response.raise_for_status()
+        
+        # Фиды Google News - простой RSS 2.0, его быстрее разобрать напрямую;
+        # feedparser используем, только если XML не разбирается
+        try:
+            return _parse_rss(response.content)
+        except ElementTree.ParseError as e:
+            self.logger.warning(f"Не удалось разобрать RSS напрямую, используем feedparser: {e}")
+            return feedparser.parse(response.content)
+    
     def _extract_news_data(self, entry) -> Dict[str, Any]:
         """Извлекает данные о новости из RSS записи"""
         try:
+            title = entry.get('title', '')
+            summary = entry.get('summary', '')
+            
+            # Сначала дешевые проверки: большинство записей отсеивается до разбора даты
+            if not self._is_valid_news(title, summary):
+                return None
+            
             # Парсим дату публикации с UTC часовым поясом
-            from datetime import timezone
             published_date = None
-            if hasattr(entry, 'published_parsed') and entry.published_parsed:
-                published_date = datetime(*entry.published_parsed[:6], tzinfo=timezone.utc)
-            elif hasattr(entry, 'updated_parsed') and entry.updated_parsed:
-                published_date = datetime(*entry.updated_parsed[:6], tzinfo=timezone.utc)
+            published_parsed = entry.get('published_parsed') or entry.get('updated_parsed')
+            if published_parsed:
+                published_date = datetime(*published_parsed[:6], tzinfo=timezone.utc)
             
             # Проверяем, что новость свежая (за последние 24 часа)
             if not self.filter.is_recent_news(published_date, 24):
                 return None
             
-            # Извлекаем источник из ссылки или заголовка
-            source = self._extract_source(entry.link) if hasattr(entry, 'link') else 'Unknown'
+            link = entry.get('link', '')
             
             news_data = {
-                'title': entry.title if hasattr(entry, 'title') else '',
-                'url': entry.link if hasattr(entry, 'link') else '',
-                'source': source,
+                'title': title,
+                'url': link,
+                'source': self._extract_source(link),
                 'published_date': published_date,
-                'description': entry.summary if hasattr(entry, 'summary') else '',
-                'keywords': self.filter.extract_keywords_from_text(
-                    (entry.title if hasattr(entry, 'title') else '') + 
-                    ' ' + (entry.summary if hasattr(entry, 'summary') else '')
-                )
+                'published_ts': int(published_date.timestamp()) if published_date else 0,
+                'description': summary,
+                'keywords': self.filter.extract_keywords_from_text(title + ' ' + summary)
             }
             
             return news_data
@@ -128,27 +178,11 @@ class GoogleNewsParser:
             if not url:
                 return 'Unknown'
             
-            # Удаляем протокол и www
-            url = url.replace('https://', '').replace('http://', '').replace('www.', '')
-            
-            # Извлекаем домен
-            domain = url.split('/')[0]
-            
-            # Убираем поддомены для известных источников
-            known_sources = {
-                'cnn.com': 'CNN',
-                'bbc.com': 'BBC',
-                'reuters.com': 'Reuters',
-                'ap.org': 'Associated Press',
-                'bloomberg.com': 'Bloomberg',
-                'techcrunch.com': 'TechCrunch',
-                'theverge.com': 'The Verge',
-                'wired.com': 'Wired',
-                'arstechnica.com': 'Ars Technica',
-                'engadget.com': 'Engadget'
-            }
+            # Извлекаем домен без протокола, www и порта
+            domain = _DOMAIN_RE.match(url).group(1).lower()
             
-            for domain_key, source_name in known_sources.items():
+            # Известный источник, если его домен входит в хост (edition.cnn.com, cnn.com.br)
+            for domain_key, source_name in _KNOWN_SOURCES.items():
                 if domain_key in domain:
                     return source_name
             
@@ -159,20 +193,14 @@ class GoogleNewsParser:
             self.logger.error(f"Ошибка при извлечении источника из URL: {e}")
             return 'Unknown'
     
-    def _is_valid_news(self, news_data: Dict[str, Any]) -> bool:
+    def _is_valid_news(self, title: str, description: str) -> bool:
         """Проверяет, подходит ли новость для включения в дайджест"""
-        if not news_data:
+        # Проверяем минимальную длину заголовка
+        if len(title) < 10:
             return False
         
-        title = news_data.get('title', '')
-        description = news_data.get('description', '')
-        
         # Проверяем наличие ключевых слов
-        if not self.filter.contains_ai_keywords(title + ' ' + description):
-            return False
-        
-        # Проверяем минимальную длину заголовка
-        if len(title) < 10:
+        if not self.filter.contains_ai_keywords_any(title, description):
             return False
         
         return True
@@ -185,7 +213,7 @@ class GoogleNewsParser:
             # URL для трендовых новостей Google News
             rss_url = "https://news.google.com/rss?hl=en-US&gl=US&ceid=US:en"
             
-            feed = feedparser.parse(rss_url)
+            feed = self._fetch_feed(rss_url)
             
             if feed.bozo:
                 self.logger.warning(f"RSS фид содержит ошибки: {feed.bozo_exception}")
@@ -197,7 +225,7 @@ class GoogleNewsParser:
                     break
                 
                 news_data = self._extract_news_data(entry)
-                if news_data and self._is_valid_news(news_data):
+                if news_data:
                     news_items.append(news_data)
                     count += 1
             
@@ -207,3 +235,33 @@ class GoogleNewsParser:
         except Exception as e:
             self.logger.error(f"Ошибка при получении трендовых новостей: {e}")
             return []
+
+def _parse_rss(content: bytes) -> feedparser.FeedParserDict:
+    """Разбирает RSS 2.0 фид без feedparser
+    
+    Возвращает ту же структуру, что и feedparser.parse, но только с полями,
+    которые использует парсер: title, link, summary и published_parsed (UTC).
+    """
+    root = ElementTree.fromstring(content)
+    entries = []
+    
+    for item in root.iter('item'):
+        entry = feedparser.FeedParserDict(
+            title=(item.findtext('title') or '').strip(),
+            link=(item.findtext('link') or '').strip(),
+            summary=item.findtext('description') or ''
+        )
+        
+        pub_date = item.findtext('pubDate')
+        if pub_date:
+            try:
+                published_date = parsedate_to_datetime(pub_date)
+                if published_date.tzinfo is None:
+                    published_date = published_date.replace(tzinfo=timezone.utc)
+                entry['published_parsed'] = published_date.utctimetuple()
+            except (TypeError, ValueError):
+                pass
+        
+        entries.append(entry)
+    
+    return feedparser.FeedParserDict(bozo=False, entries=entries)
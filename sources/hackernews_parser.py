@@ -1,18 +1,41 @@
 import logging
-from datetime import datetime, timedelta
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
 from typing import List, Dict, Any
 import requests
 from utils.config import Config
 from utils.filters import NewsFilter
+from utils import json_utils
+from utils.http_session import create_http_session
+from utils.rate_limiter import RateLimiter
 
 class HackerNewsParser:
     """Парсер для Hacker News с использованием официального API"""
     
-    def __init__(self):
+    # Сколько историй загружать одновременно
+    MAX_WORKERS = 10
+    # Не более 30 запросов в секунду к API
+    RATE_LIMIT_CALLS = 30
+    RATE_LIMIT_PERIOD = 1.0
+    # Таймаут одного запроса к API (секунды)
+    REQUEST_TIMEOUT = 10
+    # Сколько секунд переиспользовать уже загруженные истории
+    # (в пределах одного запуска разные списки часто содержат одни и те же ID)
+    STORY_CACHE_TTL = 600
+    
+    def __init__(self, session: requests.Session = None, rate_limiter: RateLimiter = None, news_filter: NewsFilter = None):
         self.config = Config()
-        self.filter = NewsFilter()
+        self.filter = news_filter if news_filter is not None else NewsFilter()
         self.logger = logging.getLogger(__name__)
+        self.session = session if session is not None else create_http_session(pool_maxsize=self.MAX_WORKERS)
+        self.rate_limiter = rate_limiter if rate_limiter is not None else RateLimiter(self.RATE_LIMIT_CALLS, self.RATE_LIMIT_PERIOD)
         self.base_url = "https://hacker-news.firebaseio.com/v0"
+        
+        # ID истории -> (время загрузки, данные истории или None, если она не подходит)
+        self._story_cache = {}
+        self._story_cache_lock = threading.Lock()
     
     def search_stories(self, max_results: int = 50) -> List[Dict[str, Any]]:
         """Поиск историй по ключевым словам за последние 24 часа"""
@@ -20,33 +43,22 @@ class HackerNewsParser:
         
         try:
             # Получаем ID топ историй
-            top_stories_response = requests.get(f"{self.base_url}/topstories.json")
+            top_stories_response = self.session.get(f"{self.base_url}/topstories.json", timeout=self.REQUEST_TIMEOUT)
             top_stories_response.raise_for_status()
-            top_story_ids = top_stories_response.json()
+            top_story_ids = json_utils.loads(top_stories_response.content)
             
             # Получаем ID новых историй
-            new_stories_response = requests.get(f"{self.base_url}/newstories.json")
+            new_stories_response = self.session.get(f"{self.base_url}/newstories.json", timeout=self.REQUEST_TIMEOUT)
             new_stories_response.raise_for_status()
-            new_story_ids = new_stories_response.json()
+            new_story_ids = json_utils.loads(new_stories_response.content)
             
-            # Объединяем и ограничиваем количество
-            all_story_ids = (top_story_ids + new_story_ids)[:max_results * 2]
+            # Объединяем без повторов (свежие истории часто есть в обоих списках) и ограничиваем количество
+            all_story_ids = list(dict.fromkeys(top_story_ids + new_story_ids))[:max_results * 2]
             
             self.logger.info(f"Проверяем {len(all_story_ids)} историй")
             
-            # Получаем детали каждой истории
-            for story_id in all_story_ids:
-                try:
-                    story_data = self._get_story_details(story_id)
-                    if story_data and self._is_valid_story(story_data):
-                        stories.append(story_data)
-                        
-                        if len(stories) >= max_results:
-                            break
-                    
-                except Exception as e:
-                    self.logger.error(f"Ошибка при получении истории {story_id}: {e}")
-                    continue
+            # Получаем детали историй параллельно
+            stories = self._collect_stories(all_story_ids, max_results)
             
             self.logger.info(f"Найдено {len(stories)} подходящих историй")
             return stories
@@ -55,65 +67,119 @@ class HackerNewsParser:
             self.logger.error(f"Ошибка при поиске историй: {e}")
             return []
     
+    def _collect_stories(self, story_ids: List[int], max_results: int) -> List[Dict[str, Any]]:
+        """Загружает детали историй параллельно и отбирает подходящие"""
+        stories = []
+        self._prune_story_cache()
+        
+        with ThreadPoolExecutor(max_workers=self.MAX_WORKERS) as executor:
+            futures = [executor.submit(self._get_story_details, story_id) for story_id in story_ids]
+            
+            try:
+                # Обходим результаты в исходном порядке ID
+                for story_id, future in zip(story_ids, futures):
+                    try:
+                        story_data = future.result()
+                        if story_data:
+                            stories.append(story_data)
+                            
+                            if len(stories) >= max_results:
+                                break
+                    
+                    except Exception as e:
+                        self.logger.error(f"Ошибка при получении истории {story_id}: {e}")
+                        continue
+            finally:
+                # Не загружаем оставшиеся истории, если набрали достаточно
+                for future in futures:
+                    future.cancel()
+        
+        return stories
+    
+    def _prune_story_cache(self):
+        """Удаляет из кэша устаревшие истории"""
+        cutoff = time.monotonic() - self.STORY_CACHE_TTL
+        with self._story_cache_lock:
+            self._story_cache = {
+                story_id: entry for story_id, entry in self._story_cache.items() if entry[0] >= cutoff
+            }
+    
     def _get_story_details(self, story_id: int) -> Dict[str, Any]:
-        """Получает детали истории по ID"""
+        """Получает детали истории по ID, используя кэш недавно загруженных историй"""
+        with self._story_cache_lock:
+            cached = self._story_cache.get(story_id)
+        
+        if cached is not None and time.monotonic() - cached[0] < self.STORY_CACHE_TTL:
+            return cached[1]
+        
         try:
-            response = requests.get(f"{self.base_url}/item/{story_id}.json")
-            response.raise_for_status()
-            story = response.json()
-            
-            if not story or story.get('type') != 'story':
-                return None
-            
-            # Парсим дату публикации с UTC часовым поясом
-            from datetime import timezone
-            published_timestamp = story.get('time')
-            if published_timestamp:
-                published_date = datetime.fromtimestamp(published_timestamp, tz=timezone.utc)
-            else:
-                published_date = None
-            
-            # Проверяем, что история свежая (за последние 24 часа)
-            if not self.filter.is_recent_news(published_date, 24):
-                return None
-            
-            story_data = {
-                'title': story.get('title', ''),
-                'url': story.get('url', f"https://news.ycombinator.com/item?id={story_id}"),
-                'author': story.get('by', ''),
-                'published_date': published_date,
-                'score': story.get('score', 0),
-                'source': 'Hacker News',
-                'comments_count': story.get('descendants', 0),
-                'keywords': self.filter.extract_keywords_from_text(story.get('title', ''))
-            }
-            
-            return story_data
-            
+            story_data = self._fetch_story_details(story_id)
         except Exception as e:
+            # Ошибки не кэшируем, при следующем обращении историю загрузим снова
             self.logger.error(f"Ошибка при получении деталей истории {story_id}: {e}")
             return None
+        
+        with self._story_cache_lock:
+            self._story_cache[story_id] = (time.monotonic(), story_data)
+        
+        return story_data
     
-    def _is_valid_story(self, story_data: Dict[str, Any]) -> bool:
-        """Проверяет, подходит ли история для включения в дайджест"""
-        if not story_data:
-            return False
+    def _fetch_story_details(self, story_id: int) -> Dict[str, Any]:
+        """Загружает детали истории по ID"""
+        with self.rate_limiter:
+            response = self.session.get(f"{self.base_url}/item/{story_id}.json", timeout=self.REQUEST_TIMEOUT)
+        response.raise_for_status()
+        story = json_utils.loads(response.content)
         
-        title = story_data.get('title', '')
+        if not story or story.get('type') != 'story':
+            return None
         
-        # Проверяем наличие ключевых слов
-        if not self.filter.contains_ai_keywords(title):
-            return False
+        title = story.get('title', '')
+        score = story.get('score', 0)
+        
+        # Отсеиваем неподходящие истории до разбора даты и сборки словаря
+        if not self._is_valid_story(title, score):
+            return None
+        
+        # Парсим дату публикации с UTC часовым поясом
+        published_timestamp = story.get('time')
+        if published_timestamp:
+            published_date = datetime.fromtimestamp(published_timestamp, tz=timezone.utc)
+        else:
+            published_date = None
+        
+        # Проверяем, что история свежая (за последние 24 часа)
+        if not self.filter.is_recent_news(published_date, 24):
+            return None
+        
+        story_data = {
+            'title': title,
+            'url': story.get('url', f"https://news.ycombinator.com/item?id={story_id}"),
+            'author': story.get('by', ''),
+            'published_date': published_date,
+            'published_ts': int(published_date.timestamp()) if published_date else 0,
+            'score': score,
+            'source': 'Hacker News',
+            'comments_count': story.get('descendants', 0),
+            'keywords': self.filter.extract_keywords_from_text(title)
+        }
         
+        return story_data
+    
+    def _is_valid_story(self, title: str, score: int) -> bool:
+        """Проверяет, подходит ли история для включения в дайджест"""
         # Проверяем минимальную длину заголовка
         if len(title) < 10:
             return False
         
         # Проверяем минимальный рейтинг
-        score = story_data.get('score', 0)
         if score < 1:
             return False
         
+        # Проверяем наличие ключевых слов
+        if not self.filter.contains_ai_keywords(title):
+            return False
+        
         return True
     
     def get_best_stories(self, max_results: int = 30) -> List[Dict[str, Any]]:
@@ -122,25 +188,14 @@ class HackerNewsParser:
         
         try:
             # Получаем ID лучших историй
-            best_stories_response = requests.get(f"{self.base_url}/beststories.json")
+            best_stories_response = self.session.get(f"{self.base_url}/beststories.json", timeout=self.REQUEST_TIMEOUT)
             best_stories_response.raise_for_status()
-            best_story_ids = best_stories_response.json()
+            best_story_ids = json_utils.loads(best_stories_response.content)
             
             self.logger.info(f"Проверяем {len(best_story_ids)} лучших историй")
             
-            # Получаем детали каждой истории
-            for story_id in best_story_ids:
-                try:
-                    story_data = self._get_story_details(story_id)
-                    if story_data and self._is_valid_story(story_data):
-                        stories.append(story_data)
-                        
-                        if len(stories) >= max_results:
-                            break
-                    
-                except Exception as e:
-                    self.logger.error(f"Ошибка при получении лучшей истории {story_id}: {e}")
-                    continue
+            # Получаем детали историй параллельно
+            stories = self._collect_stories(best_story_ids, max_results)
             
             self.logger.info(f"Найдено {len(stories)} лучших историй")
             return stories
@@ -155,25 +210,14 @@ class HackerNewsParser:
         
         try:
             # Получаем ID историй Ask HN
-            ask_hn_response = requests.get(f"{self.base_url}/askstories.json")
+            ask_hn_response = self.session.get(f"{self.base_url}/askstories.json", timeout=self.REQUEST_TIMEOUT)
             ask_hn_response.raise_for_status()
-            ask_hn_ids = ask_hn_response.json()
+            ask_hn_ids = json_utils.loads(ask_hn_response.content)
             
             self.logger.info(f"Проверяем {len(ask_hn_ids)} историй Ask HN")
             
-            # Получаем детали каждой истории
-            for story_id in ask_hn_ids:
-                try:
-                    story_data = self._get_story_details(story_id)
-                    if story_data and self._is_valid_story(story_data):
-                        stories.append(story_data)
-                        
-                        if len(stories) >= max_results:
-                            break
-                    
-                except Exception as e:
-                    self.logger.error(f"Ошибка при получении Ask HN истории {story_id}: {e}")
-                    continue
+            # Получаем детали историй параллельно
+            stories = self._collect_stories(ask_hn_ids, max_results)
             
             self.logger.info(f"Найдено {len(stories)} историй Ask HN")
             return stories
@@ -188,25 +232,14 @@ class HackerNewsParser:
         
         try:
             # Получаем ID историй Show HN
-            show_hn_response = requests.get(f"{self.base_url}/showstories.json")
+            show_hn_response = self.session.get(f"{self.base_url}/showstories.json", timeout=self.REQUEST_TIMEOUT)
             show_hn_response.raise_for_status()
-            show_hn_ids = show_hn_response.json()
+            show_hn_ids = json_utils.loads(show_hn_response.content)
             
             self.logger.info(f"Проверяем {len(show_hn_ids)} историй Show HN")
             
-            # Получаем детали каждой истории
-            for story_id in show_hn_ids:
-                try:
-                    story_data = self._get_story_details(story_id)
-                    if story_data and self._is_valid_story(story_data):
-                        stories.append(story_data)
-                        
-                        if len(stories) >= max_results:
-                            break
-                    
-                except Exception as e:
-                    self.logger.error(f"Ошибка при получении Show HN истории {story_id}: {e}")
-                    continue
+            # Получаем детали историй параллельно
+            stories = self._collect_stories(show_hn_ids, max_results)
             
             self.logger.info(f"Найдено {len(stories)} историй Show HN")
             return stories
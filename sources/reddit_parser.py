@@ -1,47 +1,112 @@
+import itertools
 import logging
-from datetime import datetime, timedelta
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
 from typing import List, Dict, Any
-import praw
+import requests
 from utils.config import Config
 from utils.filters import NewsFilter
+from utils import json_utils
+from utils.http_session import create_http_session
+
+# Признаки типа контента в URL поста (URL приводится к нижнему регистру)
+_IMAGE_URL_RE = re.compile(r'\.(?:jpg|jpeg|png|gif|webp)|imgur\.com|i\.redd\.it')
+_VIDEO_URL_RE = re.compile(r'\.(?:mp4|webm|mov)|youtube\.com|youtu\.be|vimeo\.com|streamable\.com')
+_REDDIT_URL_RE = re.compile(r'reddit\.com|redd\.it')
 
 class RedditParser:
-    """Парсер для Reddit с использованием praw"""
+    """Парсер для Reddit с использованием JSON API (OAuth, application-only)"""
+    
+    TOKEN_URL = "https://www.reddit.com/api/v1/access_token"
+    API_URL = "https://oauth.reddit.com"
+    # Таймаут одного запроса к API (секунды)
+    REQUEST_TIMEOUT = 10
+    # Сколько сабреддитов опрашивать одновременно
+    MAX_WORKERS = 5
     
-    def __init__(self):
+    def __init__(self, session: requests.Session = None, news_filter: NewsFilter = None):
         self.config = Config()
-        self.filter = NewsFilter()
+        self.filter = news_filter if news_filter is not None else NewsFilter()
         self.logger = logging.getLogger(__name__)
         
-        # Инициализируем Reddit API
+        # Проверяем учетные данные Reddit API
         if not self.config.REDDIT_CLIENT_ID or not self.config.REDDIT_CLIENT_SECRET:
             raise ValueError("Reddit API credentials не установлены")
         
-        self.reddit = praw.Reddit(
-            client_id=self.config.REDDIT_CLIENT_ID,
-            client_secret=self.config.REDDIT_CLIENT_SECRET,
-            user_agent=self.config.REDDIT_USER_AGENT
+        # Общая HTTP сессия позволяет переиспользовать соединения
+        self.session = session if session is not None else create_http_session(pool_maxsize=self.MAX_WORKERS)
+        
+        # Токен доступа получаем при первом запросе и переиспользуем до истечения срока
+        self._access_token = None
+        self._token_expires_at = 0.0
+        self._token_lock = threading.Lock()
+    
+    def _get_access_token(self) -> str:
+        """Возвращает действующий OAuth токен приложения"""
+        with self._token_lock:
+            if self._access_token is None or time.time() >= self._token_expires_at:
+                response = self.session.post(
+                    self.TOKEN_URL,
+                    auth=(self.config.REDDIT_CLIENT_ID, self.config.REDDIT_CLIENT_SECRET),
+                    data={'grant_type': 'client_credentials'},
+                    headers={'User-Agent': self.config.REDDIT_USER_AGENT},
+                    timeout=self.REQUEST_TIMEOUT
+                )
+                response.raise_for_status()
+                token = json_utils.loads(response.content)
+                
+                self._access_token = token['access_token']
+                # Обновляем токен за минуту до истечения
+                self._token_expires_at = time.time() + token.get('expires_in', 3600) - 60
+            
+            return self._access_token
+    
+    def _get_listing(self, path: str, **params) -> List[Dict[str, Any]]:
+        """Загружает список постов (listing) и возвращает их данные"""
+        params['raw_json'] = 1
+        response = self.session.get(
+            f"{self.API_URL}{path}",
+            params=params,
+            headers={
+                'Authorization': f"bearer {self._get_access_token()}",
+                'User-Agent': self.config.REDDIT_USER_AGENT
+            },
+            timeout=self.REQUEST_TIMEOUT
         )
+        response.raise_for_status()
+        listing = json_utils.loads(response.content)
+        return [child['data'] for child in listing['data']['children']]
     
     def search_posts(self, max_results: int = 50) -> List[Dict[str, Any]]:
         """Поиск постов по сабреддитам за последние 24 часа"""
-        posts = []
-        
         try:
-            # Поиск по каждому сабреддиту
-            for subreddit_name in self.config.REDDIT_SUBREDDITS:
-                try:
-                    subreddit_posts = self._search_subreddit(subreddit_name, max_results // len(self.config.REDDIT_SUBREDDITS))
-                    posts.extend(subreddit_posts)
-                    
-                    self.logger.info(f"Найдено {len(subreddit_posts)} постов в r/{subreddit_name}")
-                    
-                except Exception as e:
-                    self.logger.error(f"Ошибка при поиске в r/{subreddit_name}: {e}")
-                    continue
+            subreddits = self.config.REDDIT_SUBREDDITS
+            per_subreddit = max_results // len(subreddits)
             
-            # Удаляем дубликаты
-            posts = self.filter.remove_duplicates(posts)
+            # Сабреддиты опрашиваем одновременно, результаты собираем в исходном порядке
+            with ThreadPoolExecutor(max_workers=self.MAX_WORKERS) as executor:
+                futures = [
+                    (subreddit_name, executor.submit(self._search_subreddit, subreddit_name, per_subreddit))
+                    for subreddit_name in subreddits
+                ]
+                
+                results = []
+                for subreddit_name, future in futures:
+                    try:
+                        subreddit_posts = future.result()
+                        results.append(subreddit_posts)
+                        
+                        self.logger.info(f"Найдено {len(subreddit_posts)} постов в r/{subreddit_name}")
+                        
+                    except Exception as e:
+                        self.logger.error(f"Ошибка при поиске в r/{subreddit_name}: {e}")
+                        continue
+            
+            # Удаляем дубликаты сразу по результатам сабреддитов, без промежуточного общего списка
+            posts = self.filter.remove_duplicates(itertools.chain.from_iterable(results))
             
             self.logger.info(f"Всего найдено уникальных постов: {len(posts)}")
             return posts
@@ -55,22 +120,20 @@ class RedditParser:
         posts = []
         
         try:
-            subreddit = self.reddit.subreddit(subreddit_name)
-            
             # Получаем горячие посты
-            hot_posts = subreddit.hot(limit=max_results)
+            hot_posts = self._get_listing(f"/r/{subreddit_name}/hot", limit=max_results)
             
             for post in hot_posts:
                 post_data = self._extract_post_data(post)
-                if post_data and self._is_valid_post(post_data):
+                if post_data:
                     posts.append(post_data)
             
             # Получаем новые посты
-            new_posts = subreddit.new(limit=max_results)
+            new_posts = self._get_listing(f"/r/{subreddit_name}/new", limit=max_results)
             
             for post in new_posts:
                 post_data = self._extract_post_data(post)
-                if post_data and self._is_valid_post(post_data):
+                if post_data:
                     posts.append(post_data)
             
             return posts
@@ -79,34 +142,44 @@ class RedditParser:
             self.logger.error(f"Ошибка при поиске в r/{subreddit_name}: {e}")
             return []
     
-    def _extract_post_data(self, post) -> Dict[str, Any]:
+    def _extract_post_data(self, post: Dict[str, Any]) -> Dict[str, Any]:
         """Извлекает данные о посте"""
         try:
+            title = post.get('title', '')
+            score = post.get('score', 0)
+            
+            # Отсеиваем неподходящие посты до разбора даты и извлечения ключевых слов
+            if not self._is_valid_post(title, score):
+                return None
+            
             # Парсим дату публикации с UTC часовым поясом
-            from datetime import timezone
-            published_date = datetime.fromtimestamp(post.created_utc, tz=timezone.utc)
+            published_date = datetime.fromtimestamp(post['created_utc'], tz=timezone.utc)
             
             # Проверяем, что пост свежий (за последние 24 часа)
             if not self.filter.is_recent_news(published_date, 24):
                 return None
             
             # Всегда используем ссылку на сам пост в Reddit
-            reddit_url = f"https://reddit.com{post.permalink}"
+            reddit_url = f"https://reddit.com{post['permalink']}"
             
             # Определяем тип контента для лучшего понимания
             content_type = self._get_content_type(post)
             
+            author = post.get('author')
+            subreddit = post.get('subreddit', '')
+            
             post_data = {
-                'title': post.title,
+                'title': title,
                 'url': reddit_url,
-                'author': str(post.author) if post.author else 'deleted',
+                'author': author if author and author != '[deleted]' else 'deleted',
                 'published_date': published_date,
-                'score': post.score,
-                'source': f'Reddit r/{post.subreddit}',
-                'comments_count': post.num_comments,
-                'subreddit': post.subreddit,
+                'published_ts': int(published_date.timestamp()) if published_date else 0,
+                'score': score,
+                'source': f'Reddit r/{subreddit}',
+                'comments_count': post.get('num_comments', 0),
+                'subreddit': subreddit,
                 'content_type': content_type,
-                'keywords': self.filter.extract_keywords_from_text(post.title + ' ' + (post.selftext if hasattr(post, 'selftext') else ''))
+                'keywords': self.filter.extract_keywords_from_text(title + ' ' + post.get('selftext', ''))
             }
             
             return post_data
@@ -115,26 +188,27 @@ class RedditParser:
             self.logger.error(f"Ошибка при извлечении данных поста: {e}")
             return None
     
-    def _get_content_type(self, post) -> str:
+    def _get_content_type(self, post: Dict[str, Any]) -> str:
         """Определяет тип контента поста"""
         try:
             # Проверяем, есть ли текст поста
-            if hasattr(post, 'selftext') and post.selftext and post.selftext != '[deleted]':
+            selftext = post.get('selftext')
+            if selftext and selftext != '[deleted]':
                 return 'text'
             
             # Проверяем URL для определения типа контента
-            url = post.url.lower()
+            url = post.get('url', '').lower()
             
             # Изображения
-            if any(ext in url for ext in ['.jpg', '.jpeg', '.png', '.gif', '.webp', 'imgur.com', 'i.redd.it']):
+            if _IMAGE_URL_RE.search(url):
                 return 'image'
             
             # Видео
-            if any(ext in url for ext in ['.mp4', '.webm', '.mov', 'youtube.com', 'youtu.be', 'vimeo.com', 'streamable.com']):
+            if _VIDEO_URL_RE.search(url):
                 return 'video'
             
             # Внешние ссылки
-            if url.startswith('http') and not any(domain in url for domain in ['reddit.com', 'redd.it']):
+            if url.startswith('http') and not _REDDIT_URL_RE.search(url):
                 return 'link'
             
             # По умолчанию - текст
@@ -144,26 +218,20 @@ class RedditParser:
             self.logger.warning(f"Ошибка при определении типа контента: {e}")
             return 'unknown'
     
-    def _is_valid_post(self, post_data: Dict[str, Any]) -> bool:
+    def _is_valid_post(self, title: str, score: int) -> bool:
         """Проверяет, подходит ли пост для включения в дайджест"""
-        if not post_data:
-            return False
-        
-        title = post_data.get('title', '')
-        
-        # Проверяем наличие ключевых слов
-        if not self.filter.contains_ai_keywords(title):
-            return False
-        
         # Проверяем минимальную длину заголовка
         if len(title) < 10:
             return False
         
         # Проверяем минимальный рейтинг
-        score = post_data.get('score', 0)
         if score < 1:
             return False
         
+        # Проверяем наличие ключевых слов
+        if not self.filter.contains_ai_keywords(title):
+            return False
+        
         return True
     
     def get_trending_posts(self, max_results: int = 30) -> List[Dict[str, Any]]:
@@ -174,14 +242,16 @@ class RedditParser:
             # Поиск по всем сабреддитам
             for subreddit_name in self.config.REDDIT_SUBREDDITS:
                 try:
-                    subreddit = self.reddit.subreddit(subreddit_name)
-                    
                     # Получаем топ посты
-                    top_posts = subreddit.top(time_filter='day', limit=max_results // len(self.config.REDDIT_SUBREDDITS))
+                    top_posts = self._get_listing(
+                        f"/r/{subreddit_name}/top",
+                        t='day',
+                        limit=max_results // len(self.config.REDDIT_SUBREDDITS)
+                    )
                     
                     for post in top_posts:
                         post_data = self._extract_post_data(post)
-                        if post_data and self._is_valid_post(post_data):
+                        if post_data:
                             posts.append(post_data)
                     
                 except Exception as e:
@@ -206,14 +276,19 @@ class RedditParser:
                     # Поиск по всем сабреддитам
                     for subreddit_name in self.config.REDDIT_SUBREDDITS:
                         try:
-                            subreddit = self.reddit.subreddit(subreddit_name)
-                            
                             # Поиск по ключевому слову
-                            search_results = subreddit.search(keyword, sort='new', time_filter='day', limit=5)
+                            search_results = self._get_listing(
+                                f"/r/{subreddit_name}/search",
+                                q=keyword,
+                                restrict_sr=1,
+                                sort='new',
+                                t='day',
+                                limit=5
+                            )
                             
                             for post in search_results:
                                 post_data = self._extract_post_data(post)
-                                if post_data and self._is_valid_post(post_data):
+                                if post_data:
                                     posts.append(post_data)
                             
                         except Exception as e:
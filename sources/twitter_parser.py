@@ -1,54 +1,55 @@
 import logging
-from datetime import datetime, timedelta
-from typing import List, Dict, Any
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import List, Dict, Any, Iterable, Tuple
 import snscrape.modules.twitter as sntwitter
+from snscrape.base import ScraperException
 from utils.config import Config
 from utils.filters import NewsFilter
+from utils import json_utils
 
 class TwitterParser:
     """Парсер для Twitter/X с использованием snscrape"""
     
-    def __init__(self):
+    # Сколько поисковых запросов выполнять одновременно
+    MAX_WORKERS = 4
+    
+    # Сколько раз запускать поиск заново, если snscrape исчерпал свои повторы (429/5xx)
+    MAX_ATTEMPTS = 3
+    # Базовая задержка перед повтором в секундах, удваивается с каждой попыткой
+    RETRY_BACKOFF = 5
+    
+    def __init__(self, news_filter: NewsFilter = None):
         self.config = Config()
-        self.filter = NewsFilter()
+        self.filter = news_filter if news_filter is not None else NewsFilter()
         self.logger = logging.getLogger(__name__)
+        
+        # ID самого нового твита, доставленного в прошлых дайджестах по каждому запросу
+        self.state_file = self.config.TWITTER_STATE_FILE
+        self._last_seen_ids = self._load_state()
+        self._state_lock = threading.Lock()
     
     def search_tweets(self, max_results: int = 100) -> List[Dict[str, Any]]:
         """Поиск твитов по хэштегам за последние 24 часа"""
         tweets = []
         
         try:
-            # Вычисляем дату 24 часа назад в UTC
-            from datetime import timezone
-            since_date = datetime.now(timezone.utc) - timedelta(hours=24)
-            since_str = since_date.strftime('%Y-%m-%d')
+            # Дату 24 часа назад вычисляем один раз для всех запросов
+            since_str = _since_str(24)
             
-            # Поиск по каждому хэштегу
-            for hashtag in self.config.TWITTER_HASHTAGS:
-                try:
-                    # Формируем поисковый запрос
-                    query = f"{hashtag} since:{since_str} -filter:retweets"
-                    
-                    self.logger.info(f"Поиск твитов с запросом: {query}")
-                    
-                    # Используем snscrape для поиска
-                    scraper = sntwitter.TwitterSearchScraper(query)
-                    
-                    count = 0
-                    for tweet in scraper.get_items():
-                        if count >= max_results:
-                            break
-                        
-                        tweet_data = self._extract_tweet_data(tweet)
-                        if tweet_data and self._is_valid_tweet(tweet_data):
-                            tweets.append(tweet_data)
-                            count += 1
-                    
-                    self.logger.info(f"Найдено {count} твитов для хэштега: {hashtag}")
-                    
-                except Exception as e:
-                    self.logger.error(f"Ошибка при поиске твитов для '{hashtag}': {e}")
-                    continue
+            # Формируем поисковые запросы по каждому хэштегу
+            queries = [
+                (hashtag, _build_query(hashtag, since_str))
+                for hashtag in self.config.TWITTER_HASHTAGS
+            ]
+            
+            for hashtag, hashtag_tweets in self._scrape_queries(queries, max_results):
+                tweets.extend(hashtag_tweets)
+                self.logger.info(f"Найдено {len(hashtag_tweets)} твитов для хэштега: {hashtag}")
             
             # Удаляем дубликаты
             tweets = self.filter.remove_duplicates(tweets)
@@ -65,36 +66,18 @@ class TwitterParser:
         tweets = []
         
         try:
-            # Вычисляем дату 24 часа назад в UTC
-            from datetime import timezone
-            since_date = datetime.now(timezone.utc) - timedelta(hours=24)
-            since_str = since_date.strftime('%Y-%m-%d')
+            # Дату 24 часа назад вычисляем один раз для всех запросов
+            since_str = _since_str(24)
             
-            # Поиск по ключевым словам
-            for keyword in self.config.AI_KEYWORDS[:5]:  # Ограничиваем количество запросов
-                try:
-                    # Формируем поисковый запрос
-                    query = f'"{keyword}" since:{since_str} -filter:retweets lang:en'
-                    
-                    self.logger.info(f"Поиск твитов с запросом: {query}")
-                    
-                    scraper = sntwitter.TwitterSearchScraper(query)
-                    
-                    count = 0
-                    for tweet in scraper.get_items():
-                        if count >= max_results:
-                            break
-                        
-                        tweet_data = self._extract_tweet_data(tweet)
-                        if tweet_data and self._is_valid_tweet(tweet_data):
-                            tweets.append(tweet_data)
-                            count += 1
-                    
-                    self.logger.info(f"Найдено {count} твитов для ключевого слова: {keyword}")
-                    
-                except Exception as e:
-                    self.logger.error(f"Ошибка при поиске твитов для '{keyword}': {e}")
-                    continue
+            # Формируем поисковые запросы по ключевым словам
+            queries = [
+                (keyword, _build_query(f'"{keyword}"', since_str, 'lang:en'))
+                for keyword in self.config.AI_KEYWORDS[:5]  # Ограничиваем количество запросов
+            ]
+            
+            for keyword, keyword_tweets in self._scrape_queries(queries, max_results):
+                tweets.extend(keyword_tweets)
+                self.logger.info(f"Найдено {len(keyword_tweets)} твитов для ключевого слова: {keyword}")
             
             # Удаляем дубликаты
             tweets = self.filter.remove_duplicates(tweets)
@@ -106,6 +89,113 @@ class TwitterParser:
             self.logger.error(f"Ошибка при поиске твитов по ключевым словам: {e}")
             return []
     
+    def _scrape_queries(self, queries: List[Tuple[str, str]], max_results: int) -> List[Tuple[str, List[Dict[str, Any]]]]:
+        """Выполняет поисковые запросы одновременно
+        
+        queries - список пар (название, запрос). Возвращает пары (название, твиты)
+        в исходном порядке; запросы, завершившиеся ошибкой, пропускаются.
+        """
+        results = []
+        
+        # Каждый запрос использует собственный scraper, поэтому их можно выполнять в разных потоках;
+        # размер пула ограничивает число одновременных запросов, чтобы не получить 429
+        with ThreadPoolExecutor(max_workers=self.MAX_WORKERS) as executor:
+            futures = [(name, executor.submit(self._scrape_query, query, max_results, name)) for name, query in queries]
+            
+            for name, future in futures:
+                try:
+                    results.append((name, future.result()))
+                except Exception as e:
+                    self.logger.error(f"Ошибка при поиске твитов для '{name}': {e}")
+        
+        return results
+    
+    def _scrape_query(self, query: str, max_results: int, state_key: str = None) -> List[Dict[str, Any]]:
+        """Возвращает до max_results подходящих твитов по поисковому запросу
+        
+        Если указан state_key, поиск останавливается на твитах, уже доставленных
+        в прошлых дайджестах по этому ключу (выдача идет от новых твитов к старым),
+        а найденные твиты помечаются ключом для save_state.
+        """
+        tweets = []
+        last_seen_id = self._last_seen_ids.get(state_key, 0) if state_key else 0
+        # ID последнего обработанного твита, чтобы после повтора не обрабатывать выдачу заново
+        oldest_id = None
+        
+        self.logger.info(f"Поиск твитов с запросом: {query}")
+        
+        for attempt in range(1, self.MAX_ATTEMPTS + 1):
+            # Используем snscrape для поиска
+            scraper = sntwitter.TwitterSearchScraper(query)
+            
+            try:
+                for tweet in scraper.get_items():
+                    if len(tweets) >= max_results or tweet.id <= last_seen_id:
+                        break
+                    
+                    if oldest_id is not None and tweet.id >= oldest_id:
+                        continue
+                    oldest_id = tweet.id
+                    
+                    tweet_data = self._extract_tweet_data(tweet)
+                    if tweet_data and self._is_valid_tweet(tweet_data):
+                        if state_key:
+                            tweet_data['state_key'] = state_key
+                        tweets.append(tweet_data)
+                break
+            except ScraperException as e:
+                if attempt == self.MAX_ATTEMPTS:
+                    self.logger.warning(f"Поиск '{query}' прерван, оставляем {len(tweets)} найденных твитов: {e}")
+                    return tweets
+                
+                delay = self.RETRY_BACKOFF * 2 ** (attempt - 1) + random.uniform(0, 1)
+                self.logger.warning(f"Ошибка поиска '{query}' (попытка {attempt}/{self.MAX_ATTEMPTS}), повтор через {delay:.1f}с: {e}")
+                time.sleep(delay)
+        
+        return tweets
+    
+    def _load_state(self) -> Dict[str, int]:
+        """Загружает ID последних просмотренных твитов"""
+        try:
+            with open(self.state_file, 'rb') as f:
+                return json_utils.loads(f.read())
+        except FileNotFoundError:
+            return {}
+        except Exception as e:
+            self.logger.warning(f"Не удалось прочитать {self.state_file}: {e}")
+            return {}
+    
+    def save_state(self, delivered_news: Iterable[Dict[str, Any]]):
+        """Запоминает ID самых новых доставленных твитов по каждому запросу
+        
+        Вызывается только после успешной отправки дайджеста, поэтому пробные
+        и тестовые запросы, а также фоновое обновление кэша состояние не сдвигают.
+        """
+        newest_ids = {}
+        for news in delivered_news:
+            state_key = news.get('state_key')
+            tweet_id = news.get('tweet_id')
+            if state_key and tweet_id:
+                newest_ids[state_key] = max(newest_ids.get(state_key, 0), tweet_id)
+        
+        if not newest_ids:
+            return
+        
+        with self._state_lock:
+            for state_key, tweet_id in newest_ids.items():
+                self._last_seen_ids[state_key] = max(self._last_seen_ids.get(state_key, 0), tweet_id)
+            
+            tmp_path = f"{self.state_file}.tmp"
+            try:
+                directory = os.path.dirname(self.state_file)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                with open(tmp_path, 'wb') as f:
+                    f.write(json_utils.dumps(self._last_seen_ids))
+                os.replace(tmp_path, self.state_file)
+            except Exception as e:
+                self.logger.warning(f"Не удалось сохранить {self.state_file}: {e}")
+    
     def _extract_tweet_data(self, tweet) -> Dict[str, Any]:
         """Извлекает данные о твите"""
         try:
@@ -116,8 +206,10 @@ class TwitterParser:
             tweet_data = {
                 'title': tweet.content,  # Показываем полный текст твита
                 'url': tweet.url,
+                'tweet_id': tweet.id,
                 'author': tweet.user.username,
                 'published_date': tweet.date,
+                'published_ts': int(tweet.date.timestamp()),
                 'source': 'Twitter/X',
                 'retweet_count': tweet.retweetCount,
                 'like_count': tweet.likeCount,
@@ -157,26 +249,10 @@ class TwitterParser:
         tweets = []
         
         try:
-            # Поиск популярных твитов
-            since_date = datetime.now() - timedelta(hours=24)
-            since_str = since_date.strftime('%Y-%m-%d')
-            
             # Комбинированный запрос для популярных твитов
-            query = f'(AI OR "artificial intelligence" OR ChatGPT OR OpenAI) since:{since_str} -filter:retweets min_faves:10'
+            query = _build_query('(AI OR "artificial intelligence" OR ChatGPT OR OpenAI)', _since_str(24), 'min_faves:10')
             
-            self.logger.info(f"Поиск популярных твитов: {query}")
-            
-            scraper = sntwitter.TwitterSearchScraper(query)
-            
-            count = 0
-            for tweet in scraper.get_items():
-                if count >= max_results:
-                    break
-                
-                tweet_data = self._extract_tweet_data(tweet)
-                if tweet_data and self._is_valid_tweet(tweet_data):
-                    tweets.append(tweet_data)
-                    count += 1
+            tweets = self._scrape_query(query, max_results)
             
             self.logger.info(f"Найдено {len(tweets)} популярных твитов")
             return tweets
@@ -184,3 +260,12 @@ class TwitterParser:
         except Exception as e:
             self.logger.error(f"Ошибка при получении популярных твитов: {e}")
             return []
+
+def _since_str(hours: int) -> str:
+    """Дата N часов назад (UTC) в формате оператора since:"""
+    return (datetime.now(timezone.utc) - timedelta(hours=hours)).strftime('%Y-%m-%d')
+
+def _build_query(term: str, since_str: str, extra: str = '') -> str:
+    """Собирает поисковый запрос без ретвитов начиная с даты since_str"""
+    query = f"{term} since:{since_str} -filter:retweets"
+    return f"{query} {extra}" if extra else query
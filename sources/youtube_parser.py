@@ -1,17 +1,37 @@
 import logging
-from datetime import datetime, timedelta
-from typing import List, Dict, Any
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import List, Dict, Any, Optional
+import httplib2
 from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
 from utils.config import Config
 from utils.filters import NewsFilter
 
+# Длительность видео в формате ISO 8601: P[nD]T[nH][nM][nS]
+_ISO8601_DURATION_RE = re.compile(r'^P(?:(\d+)D)?(?:T(?:(\d+)H)?(?:(\d+)M)?(?:(\d+)S)?)?$')
+
+# Страны и языки англоязычных и русскоязычных каналов
+_ALLOWED_COUNTRIES = frozenset({
+    'US', 'GB', 'CA', 'AU', 'NZ', 'IE', 'RU', 'BY', 'KZ', 'KG', 'TJ', 'UZ', 'AM', 'AZ', 'GE', 'MD', 'UA'
+})
+_ALLOWED_LANGUAGES = frozenset({'en', 'ru'})
+
 class YouTubeParser:
     """Парсер для YouTube с использованием YouTube Data API v3"""
     
-    def __init__(self):
+    # Максимум ID в одном запросе videos.list / channels.list
+    API_BATCH_SIZE = 50
+    # Сколько поисковых запросов выполнять одновременно
+    MAX_WORKERS = 5
+    # Таймаут одного запроса к API (секунды)
+    REQUEST_TIMEOUT = 30
+    
+    def __init__(self, news_filter: NewsFilter = None):
         self.config = Config()
-        self.filter = NewsFilter()
+        self.filter = news_filter if news_filter is not None else NewsFilter()
         self.logger = logging.getLogger(__name__)
         
         if not self.config.YOUTUBE_API_KEY:
@@ -19,6 +39,7 @@ class YouTubeParser:
         
         # Инициализируем YouTube API
         self.youtube = build('youtube', 'v3', developerKey=self.config.YOUTUBE_API_KEY)
+        self._thread_local = threading.local()
     
     def search_videos(self, max_results: int = 50) -> List[Dict[str, Any]]:
         """Поиск видео по ключевым словам за последние 24 часа"""
@@ -26,44 +47,49 @@ class YouTubeParser:
         
         try:
             # Вычисляем время 24 часа назад в формате ISO 8601 для YouTube API
-            from datetime import timezone
             cutoff_time = datetime.now(timezone.utc) - timedelta(hours=24)
             # Убираем микросекунды для YouTube API
             cutoff_time = cutoff_time.replace(microsecond=0)
             published_after = cutoff_time.strftime('%Y-%m-%dT%H:%M:%S.000Z')
             
-            # Поиск по каждому ключевому слову
-            for keyword in self.config.AI_KEYWORDS[:15]:  # Увеличиваем количество запросов
+            # Этап 1: собираем подходящие видео по всем ключевым словам
+            # без запросов длительности и информации о каналах
+            candidates = {}  # video_id -> (данные видео, channel_id)
+            
+            # Поисковые запросы по ключевым словам выполняем одновременно
+            keywords = self.config.AI_KEYWORDS[:15]  # Увеличиваем количество запросов
+            search_requests = [
+                self.youtube.search().list(
+                    part='snippet',
+                    q=keyword,
+                    type='video',
+                    order='date',
+                    publishedAfter=published_after,
+                    maxResults=min(max_results, 50),  # YouTube API лимит
+                    regionCode='US',
+                    relevanceLanguage='en',
+                    safeSearch='moderate'
+                )
+                for keyword in keywords
+            ]
+            
+            with ThreadPoolExecutor(max_workers=self.MAX_WORKERS) as executor:
+                futures = [executor.submit(self._execute, request) for request in search_requests]
+            
+            # Результаты обрабатываем в исходном порядке ключевых слов
+            for keyword, future in zip(keywords, futures):
                 try:
-                    search_response = self.youtube.search().list(
-                        part='snippet',
-                        q=keyword,
-                        type='video',
-                        order='date',
-                        publishedAfter=published_after,
-                        maxResults=min(max_results, 50),  # YouTube API лимит
-                        regionCode='US',
-                        relevanceLanguage='en',
-                        safeSearch='moderate'
-                    ).execute()
+                    search_response = future.result()
                     
                     for item in search_response.get('items', []):
+                        video_id = item.get('id', {}).get('videoId', '')
+                        if not video_id or video_id in candidates:
+                            continue
+                        
                         video_data = self._extract_video_data(item)
                         if video_data and self._is_valid_video(video_data):
-                            # Получаем информацию о канале
                             channel_id = item['snippet'].get('channelId', '')
-                            channel_info = self._get_channel_info(channel_id)
-                            
-                            # Проверяем язык канала и страну
-                            if not self._is_english_or_russian_channel(channel_info, video_data.get('title', '')):
-                                continue
-                            
-                            # Получаем длительность видео
-                            duration = self._get_video_duration(video_data.get('url', ''))
-                            if duration and duration >= 180:  # 3 минуты = 180 секунд
-                                video_data['duration'] = duration
-                                video_data['channel_info'] = channel_info
-                                videos.append(video_data)
+                            candidates[video_id] = (video_data, channel_id)
                     
                     self.logger.info(f"Найдено {len(search_response.get('items', []))} видео для ключевого слова: {keyword}")
                     
@@ -71,6 +97,25 @@ class YouTubeParser:
                     self.logger.error(f"Ошибка при поиске видео для '{keyword}': {e}")
                     continue
             
+            # Этап 2: длительности и информацию о каналах запрашиваем пачками
+            durations = self._get_video_durations(list(candidates))
+            channel_ids = list(dict.fromkeys(channel_id for _, channel_id in candidates.values() if channel_id))
+            channels_info = self._get_channels_info(channel_ids)
+            
+            for video_id, (video_data, channel_id) in candidates.items():
+                channel_info = channels_info.get(channel_id, {})
+                
+                # Проверяем язык канала и страну
+                if not self._is_english_or_russian_channel(channel_info, video_data.get('title', '')):
+                    continue
+                
+                # Проверяем длительность видео
+                duration = durations.get(video_id)
+                if duration and duration >= 180:  # 3 минуты = 180 секунд
+                    video_data['duration'] = duration
+                    video_data['channel_info'] = channel_info
+                    videos.append(video_data)
+            
             # Удаляем дубликаты
             videos = self.filter.remove_duplicates(videos)
             
@@ -81,6 +126,17 @@ class YouTubeParser:
             self.logger.error(f"Ошибка при поиске видео на YouTube: {e}")
             return []
     
+    def _execute(self, request):
+        """Выполняет запрос к API
+        
+        httplib2.Http, через который работает клиент, не потокобезопасен,
+        поэтому каждый поток использует собственный экземпляр.
+        """
+        http = getattr(self._thread_local, 'http', None)
+        if http is None:
+            http = self._thread_local.http = httplib2.Http(timeout=self.REQUEST_TIMEOUT)
+        return request.execute(http=http)
+    
     def _extract_video_data(self, item: Dict[str, Any]) -> Dict[str, Any]:
         """Извлекает данные о видео из ответа API"""
         try:
@@ -95,25 +151,7 @@ class YouTubeParser:
                     video_id = str(item['id'])
             
             # Парсим дату публикации
-            published_at = snippet.get('publishedAt', '')
-            published_date = None
-            
-            if published_at:
-                try:
-                    # Обрабатываем разные форматы даты
-                    if published_at.endswith('Z'):
-                        published_date = datetime.fromisoformat(published_at.replace('Z', '+00:00'))
-                    else:
-                        published_date = datetime.fromisoformat(published_at)
-                    
-                    # Убеждаемся, что дата имеет часовой пояс UTC
-                    from datetime import timezone
-                    if published_date.tzinfo is None:
-                        published_date = published_date.replace(tzinfo=timezone.utc)
-                    
-                except ValueError as date_error:
-                    self.logger.warning(f"Ошибка парсинга даты '{published_at}': {date_error}")
-                    published_date = None
+            published_date = self._parse_published_date(snippet.get('publishedAt', ''))
             
             # Проверяем, что видео свежее 24 часов
             if not self.filter.is_recent_news(published_date, 24):
@@ -136,6 +174,7 @@ class YouTubeParser:
                 'channel': snippet.get('channelTitle', ''),
                 'description': description,
                 'published_date': published_date,
+                'published_ts': int(published_date.timestamp()) if published_date else 0,
                 'source': 'YouTube',
                 'keywords': keywords
             }
@@ -147,54 +186,53 @@ class YouTubeParser:
             self.logger.debug(f"Проблемный item: {item}")
             return None
     
-    def _get_video_duration(self, video_url: str) -> int:
-        """Получает длительность видео в секундах"""
-        try:
-            # Извлекаем video_id из URL
-            if 'watch?v=' in video_url:
-                video_id = video_url.split('watch?v=')[1].split('&')[0]
-            else:
-                return None
-            
-            # Получаем детальную информацию о видео
-            video_response = self.youtube.videos().list(
-                part='contentDetails',
-                id=video_id
-            ).execute()
-            
-            if video_response.get('items'):
-                duration_str = video_response['items'][0]['contentDetails']['duration']
-                return self._parse_duration(duration_str)
-            
-            return None
-            
-        except Exception as e:
-            self.logger.warning(f"Ошибка получения длительности видео {video_url}: {e}")
-            return None
+    def _get_video_durations(self, video_ids: List[str]) -> Dict[str, int]:
+        """Получает длительность видео в секундах (до 50 ID за один запрос)"""
+        durations = {}
+        
+        for start in range(0, len(video_ids), self.API_BATCH_SIZE):
+            batch = video_ids[start:start + self.API_BATCH_SIZE]
+            try:
+                video_response = self.youtube.videos().list(
+                    part='contentDetails',
+                    id=','.join(batch),
+                    maxResults=self.API_BATCH_SIZE
+                ).execute()
+                
+                for item in video_response.get('items', []):
+                    durations[item['id']] = self._parse_duration(item['contentDetails']['duration'])
+                
+            except Exception as e:
+                self.logger.warning(f"Ошибка получения длительности видео {','.join(batch)}: {e}")
+        
+        return durations
     
-    def _get_channel_info(self, channel_id: str) -> dict:
-        """Получает информацию о канале"""
-        try:
-            channel_response = self.youtube.channels().list(
-                part='snippet,statistics',
-                id=channel_id
-            ).execute()
-            
-            if channel_response.get('items'):
-                channel = channel_response['items'][0]
-                return {
-                    'title': channel['snippet'].get('title', ''),
-                    'description': channel['snippet'].get('description', ''),
-                    'country': channel['snippet'].get('country', ''),
-                    'default_language': channel['snippet'].get('defaultLanguage', ''),
-                    'view_count': channel['statistics'].get('viewCount', '0')
-                }
-            
-            return {}
-            
-        except Exception as e:
-            self.logger.warning(f"Ошибка получения информации о канале {channel_id}: {e}")
-            return {}
+    def _get_channels_info(self, channel_ids: List[str]) -> Dict[str, dict]:
+        """Получает информацию о каналах (до 50 ID за один запрос)"""
+        channels_info = {}
+        
+        for start in range(0, len(channel_ids), self.API_BATCH_SIZE):
+            batch = channel_ids[start:start + self.API_BATCH_SIZE]
+            try:
+                channel_response = self.youtube.channels().list(
+                    part='snippet,statistics',
+                    id=','.join(batch),
+                    maxResults=self.API_BATCH_SIZE
+                ).execute()
+                
+                for channel in channel_response.get('items', []):
+                    channels_info[channel['id']] = {
+                        'title': channel['snippet'].get('title', ''),
+                        'description': channel['snippet'].get('description', ''),
+                        'country': channel['snippet'].get('country', ''),
+                        'default_language': channel['snippet'].get('defaultLanguage', ''),
+                        'view_count': channel['statistics'].get('viewCount', '0')
+                    }
+                
+            except Exception as e:
+                self.logger.warning(f"Ошибка получения информации о каналах {','.join(batch)}: {e}")
+        
+        return channels_info
     
     def _is_english_or_russian_channel(self, channel_info: dict, video_title: str) -> bool:
         """Проверяет, является ли канал англоязычным или русскоязычным"""
@@ -204,12 +242,12 @@ class YouTubeParser:
         
         # Проверяем страну канала
         country = channel_info.get('country', '').upper()
-        if country in ['US', 'GB', 'CA', 'AU', 'NZ', 'IE', 'RU', 'BY', 'KZ', 'KG', 'TJ', 'UZ', 'AM', 'AZ', 'GE', 'MD', 'UA']:
+        if country in _ALLOWED_COUNTRIES:
             return True
         
         # Проверяем язык канала
         default_language = channel_info.get('default_language', '').lower()
-        if default_language in ['en', 'ru']:
+        if default_language in _ALLOWED_LANGUAGES:
             return True
         
         # Проверяем название и описание канала
@@ -222,31 +260,34 @@ class YouTubeParser:
         # Проверяем название видео
         return self.filter.is_english_or_russian(video_title)
     
+    def _parse_published_date(self, published_at: str) -> Optional[datetime]:
+        """Парсит дату публикации (2024-01-01T12:00:00Z) в datetime с часовым поясом UTC"""
+        if not published_at:
+            return None
+        
+        try:
+            # fromisoformat до Python 3.11 не понимает суффикс Z
+            if published_at.endswith('Z'):
+                published_at = published_at[:-1] + '+00:00'
+            published_date = datetime.fromisoformat(published_at)
+        except ValueError as date_error:
+            self.logger.warning(f"Ошибка парсинга даты '{published_at}': {date_error}")
+            return None
+        
+        if published_date.tzinfo is None:
+            published_date = published_date.replace(tzinfo=timezone.utc)
+        
+        return published_date
+    
     def _parse_duration(self, duration_str: str) -> int:
         """Парсит длительность в формате ISO 8601 (PT1H2M3S) в секунды"""
-        try:
-            import re
-            # Убираем PT и парсим компоненты
-            duration_str = duration_str.replace('PT', '')
-            
-            # Ищем часы, минуты и секунды
-            hours = re.search(r'(\d+)H', duration_str)
-            minutes = re.search(r'(\d+)M', duration_str)
-            seconds = re.search(r'(\d+)S', duration_str)
-            
-            total_seconds = 0
-            if hours:
-                total_seconds += int(hours.group(1)) * 3600
-            if minutes:
-                total_seconds += int(minutes.group(1)) * 60
-            if seconds:
-                total_seconds += int(seconds.group(1))
-            
-            return total_seconds
-            
-        except Exception as e:
-            self.logger.warning(f"Ошибка парсинга длительности '{duration_str}': {e}")
+        match = _ISO8601_DURATION_RE.match(duration_str or '')
+        if not match:
+            self.logger.warning(f"Ошибка парсинга длительности '{duration_str}'")
             return 0
+        
+        days, hours, minutes, seconds = (int(value or 0) for value in match.groups())
+        return days * 86400 + hours * 3600 + minutes * 60 + seconds
 
     def _is_valid_video(self, video_data: Dict[str, Any]) -> bool:
         """Проверяет, подходит ли видео для включения в дайджест"""
@@ -256,18 +297,11 @@ class YouTubeParser:
         title = video_data.get('title', '')
         description = video_data.get('description', '')
         
-        # Проверяем наличие ключевых слов
-        if not self.filter.contains_ai_keywords(title + ' ' + description):
+        # Проверяем наличие ключевых слов и отсутствие исключаемых (научные статьи и т.п.);
+        # contains_ai_keywords_any проверяет и то и другое по заранее подготовленным таблицам
+        if not self.filter.contains_ai_keywords_any(title, description):
             return False
         
-        # Проверяем, что это не научная статья
-        text = (title + ' ' + description).lower()
-        exclude_keywords = self.config.EXCLUDE_KEYWORDS
-        
-        for exclude_word in exclude_keywords:
-            if exclude_word.lower() in text:
-                return False
-        
         return True
     
     def get_trending_videos(self, max_results: int = 20) -> List[Dict[str, Any]]:
@@ -306,25 +340,7 @@ class YouTubeParser:
             video_id = item.get('id', '')
             
             # Парсим дату публикации
-            published_at = snippet.get('publishedAt', '')
-            published_date = None
-            
-            if published_at:
-                try:
-                    # Обрабатываем разные форматы даты
-                    if published_at.endswith('Z'):
-                        published_date = datetime.fromisoformat(published_at.replace('Z', '+00:00'))
-                    else:
-                        published_date = datetime.fromisoformat(published_at)
-                    
-                    # Убеждаемся, что дата имеет часовой пояс UTC
-                    from datetime import timezone
-                    if published_date.tzinfo is None:
-                        published_date = published_date.replace(tzinfo=timezone.utc)
-                    
-                except ValueError as date_error:
-                    self.logger.warning(f"Ошибка парсинга даты трендового видео '{published_at}': {date_error}")
-                    published_date = None
+            published_date = self._parse_published_date(snippet.get('publishedAt', ''))
             
             # Безопасно извлекаем ключевые слова
             title = snippet.get('title', '')
@@ -343,6 +359,7 @@ class YouTubeParser:
                 'channel': snippet.get('channelTitle', ''),
                 'description': description,
                 'published_date': published_date,
+                'published_ts': int(published_date.timestamp()) if published_date else 0,
                 'source': 'YouTube (Trending)',
                 'view_count': statistics.get('viewCount', 0),
                 'keywords': keywords
@@ -5,16 +5,15 @@
 """
 
 import sys
-import os
+import importlib
 import logging
-from datetime import datetime
-
-# Добавляем текущую директорию в путь для импортов
-sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
 
 from utils.config import Config, setup_logging
 from utils.filters import NewsFilter
 from utils.telegram_sender import TelegramSender
+from main import AINewsAggregator, ParserSpec
 
 def test_config():
     """Тестирует конфигурацию"""
@@ -64,6 +63,19 @@ def test_filters():
             contains_ai = filter_obj.contains_ai_keywords(text)
             print(f"   '{text[:30]}...' -> {'OK' if contains_ai else 'ERROR'}")
         
+        # Дубликат по заголовку не должен вытеснять первую новость и повторять чужой URL
+        now = datetime.now()
+        test_news = [
+            {'title': 'OpenAI opens ChatGPT to everyone', 'url': 'https://example.com/u2', 'published_date': now - timedelta(hours=5)},
+            {'title': 'OpenAI announces a new ChatGPT model', 'url': 'https://example.com/u1', 'published_date': now - timedelta(hours=3)},
+            {'title': 'OpenAI announces a new ChatGPT model!', 'url': 'https://example.com/u2', 'published_date': now - timedelta(hours=1)}
+        ]
+        unique_urls = [news['url'] for news in filter_obj.deduplicate_and_filter(test_news, min_score=0)]
+        if sorted(unique_urls) != ['https://example.com/u1', 'https://example.com/u2']:
+            print(f"ERROR Ошибка удаления дубликатов: {unique_urls}")
+            return False
+        print("   Удаление дубликатов -> OK")
+        
         print("OK Фильтры работают корректно")
         return True
         
@@ -71,10 +83,17 @@ def test_filters():
         print(f"ERROR Ошибка фильтров: {e}")
         return False
 
-def test_telegram():
-    """Тестирует Telegram интеграцию"""
+def test_telegram(send_message: bool = True):
+    """Тестирует Telegram интеграцию
+    
+    send_message=False пропускает отправку тестового сообщения.
+    """
     print("\nTELEGRAM Тестирование Telegram...")
     
+    if not send_message:
+        print("⏭️ Отправка пропущена (запустите с --with-network)")
+        return True
+    
     try:
         sender = TelegramSender()
         
@@ -93,76 +112,45 @@ def test_telegram():
         print(f"ERROR Ошибка Telegram: {e}")
         return False
 
-def test_parsers():
-    """Тестирует парсеры"""
+def _run_parser(spec: ParserSpec):
+    """Создает парсер и запрашивает одну новость"""
+    module = importlib.import_module(spec.module)
+    parser = getattr(module, spec.class_name)()
+    return getattr(parser, spec.fetch_method)(max_results=1)
+
+def test_parsers(fetch_news: bool = True):
+    """Тестирует парсеры
+    
+    fetch_news=False пропускает запросы к источникам.
+    """
     print("\nTEST Тестирование парсеров...")
     
+    if not fetch_news:
+        print("⏭️ Запросы к источникам пропущены (запустите с --with-network)")
+        return True
+    
     config = Config()
     results = {}
-    
-    # YouTube
-    if config.ENABLE_YOUTUBE:
-        try:
-            from sources.youtube_parser import YouTubeParser
-            parser = YouTubeParser()
-            news = parser.search_videos(max_results=1)
-            results['YouTube'] = f"OK {len(news)} новостей"
-        except Exception as e:
-            results['YouTube'] = f"ERROR {str(e)[:50]}..."
-    else:
-        results['YouTube'] = "⏭️ отключен"
-    
-    # Twitter
-    if config.ENABLE_TWITTER:
-        try:
-            from sources.twitter_parser import TwitterParser
-            parser = TwitterParser()
-            news = parser.search_tweets(max_results=1)
-            results['Twitter'] = f"OK {len(news)} новостей"
-        except Exception as e:
-            results['Twitter'] = f"ERROR {str(e)[:50]}..."
-    else:
-        results['Twitter'] = "⏭️ отключен"
-    
-    # Google News
-    if config.ENABLE_GOOGLE_NEWS:
-        try:
-            from sources.google_news_parser import GoogleNewsParser
-            parser = GoogleNewsParser()
-            news = parser.search_news(max_results=1)
-            results['Google News'] = f"OK {len(news)} новостей"
-        except Exception as e:
-            results['Google News'] = f"ERROR {str(e)[:50]}..."
-    else:
-        results['Google News'] = "⏭️ отключен"
-    
-    # Hacker News
-    if config.ENABLE_HACKERNEWS:
-        try:
-            from sources.hackernews_parser import HackerNewsParser
-            parser = HackerNewsParser()
-            news = parser.search_stories(max_results=1)
-            results['Hacker News'] = f"OK {len(news)} новостей"
-        except Exception as e:
-            results['Hacker News'] = f"ERROR {str(e)[:50]}..."
-    else:
-        results['Hacker News'] = "⏭️ отключен"
-    
-    # Reddit
-    if config.ENABLE_REDDIT:
-        try:
-            from sources.reddit_parser import RedditParser
-            parser = RedditParser()
-            news = parser.search_posts(max_results=1)
-            results['Reddit'] = f"OK {len(news)} новостей"
-        except Exception as e:
-            results['Reddit'] = f"ERROR {str(e)[:50]}..."
-    else:
-        results['Reddit'] = "⏭️ отключен"
+    futures = {}
+    
+    # Парсеры независимы и ждут сеть, поэтому запускаем их параллельно
+    with ThreadPoolExecutor(max_workers=len(AINewsAggregator.PARSER_REGISTRY)) as executor:
+        for spec in AINewsAggregator.PARSER_REGISTRY:
+            if getattr(config, spec.enable_flag):
+                futures[spec.display_name] = executor.submit(_run_parser, spec)
+            else:
+                results[spec.display_name] = "⏭️ отключен"
+        
+        for name, future in futures.items():
+            try:
+                news = future.result()
+                results[name] = f"OK {len(news)} новостей"
+            except Exception as e:
+                results[name] = f"ERROR {str(e)[:50]}..."
     
     # Выводим результаты
-    for source, result in results.items():
-        print(f"   {source}: {result}")
+    for spec in AINewsAggregator.PARSER_REGISTRY:
+        print(f"   {spec.display_name}: {results[spec.display_name]}")
     
     return True
 
@@ -174,11 +162,14 @@ def main():
     # Настраиваем логирование
     logger = setup_logging()
     
+    # Запросы к источникам и тестовое сообщение в Telegram выполняем только по явному запросу
+    with_network = '--with-network' in sys.argv[1:]
+    
     tests = [
         ("Конфигурация", test_config),
         ("Фильтры", test_filters),
-        ("Telegram", test_telegram),
-        ("Парсеры", test_parsers)
+        ("Telegram", lambda: test_telegram(send_message=with_network)),
+        ("Парсеры", lambda: test_parsers(fetch_news=with_network))
     ]
     
     passed = 0
@@ -0,0 +1,111 @@
+import hashlib
+import logging
+import math
+import os
+import struct
+import threading
+from typing import Iterable
+
+class BloomFilter:
+    """Фильтр Блума с сохранением на диск
+
+    Проверка принадлежности занимает O(1) и около 14 бит на элемент
+    при error_rate = 0.001. Ложноотрицательных ответов не бывает,
+    ложноположительные возможны с вероятностью error_rate.
+    """
+
+    _HEADER = struct.Struct('<QQQ')
+
+    def __init__(self, capacity: int = 100000, error_rate: float = 0.001):
+        self.capacity = capacity
+        self.size = max(int(-capacity * math.log(error_rate) / (math.log(2) ** 2)), 8)
+        self.hash_count = max(int(round(self.size / capacity * math.log(2))), 1)
+        self.count = 0
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, item: str) -> Iterable[int]:
+        # Двойное хеширование: k позиций из двух 64-битных половин одного дайджеста
+        digest = hashlib.blake2b(item.encode('utf-8'), digest_size=16).digest()
+        h1, h2 = struct.unpack('<QQ', digest)
+        return ((h1 + i * h2) % self.size for i in range(self.hash_count))
+
+    def __contains__(self, item: str) -> bool:
+        return all(self._bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(item))
+
+    def add(self, item: str):
+        """Добавляет элемент в фильтр"""
+        for pos in self._positions(item):
+            self._bits[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+    def is_full(self) -> bool:
+        """Превышена ли расчетная емкость (доля ложных срабатываний начинает расти)"""
+        return self.count >= self.capacity
+
+    def to_bytes(self) -> bytes:
+        return self._HEADER.pack(self.size, self.hash_count, self.count) + bytes(self._bits)
+
+    @classmethod
+    def from_bytes(cls, data: bytes, capacity: int) -> 'BloomFilter':
+        size, hash_count, count = cls._HEADER.unpack_from(data)
+        bits = data[cls._HEADER.size:]
+        if len(bits) != (size + 7) // 8:
+            raise ValueError("размер данных не совпадает с заголовком")
+
+        bloom = cls.__new__(cls)
+        bloom.capacity = capacity
+        bloom.size = size
+        bloom.hash_count = hash_count
+        bloom.count = count
+        bloom._bits = bytearray(bits)
+        return bloom
+
+class SeenUrls:
+    """Множество уже отправленных URL, сохраняемое между запусками"""
+
+    def __init__(self, path: str = 'data/seen_urls.bloom', capacity: int = 100000, error_rate: float = 0.001):
+        self.path = path
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.logger = logging.getLogger(__name__)
+        self._lock = threading.Lock()
+        self._bloom = self._load()
+
+    def __contains__(self, url: str) -> bool:
+        return url in self._bloom
+
+    def add_many(self, urls: Iterable[str]):
+        """Запоминает URL и сохраняет фильтр на диск"""
+        with self._lock:
+            for url in urls:
+                if url:
+                    self._bloom.add(url)
+
+            if self._bloom.is_full():
+                self.logger.warning(f"Фильтр отправленных URL заполнен ({self._bloom.count}), начинаем новый")
+                self._bloom = BloomFilter(self.capacity, self.error_rate)
+
+            self._save()
+
+    def _load(self) -> BloomFilter:
+        try:
+            with open(self.path, 'rb') as f:
+                return BloomFilter.from_bytes(f.read(), self.capacity)
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            self.logger.warning(f"Не удалось прочитать {self.path}: {e}")
+
+        return BloomFilter(self.capacity, self.error_rate)
+
+    def _save(self):
+        tmp_path = f"{self.path}.tmp"
+        try:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(tmp_path, 'wb') as f:
+                f.write(self._bloom.to_bytes())
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            self.logger.warning(f"Не удалось сохранить {self.path}: {e}")
@@ -0,0 +1,109 @@
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+from utils import json_utils
+
+class NewsCache:
+    """Файловый TTL кэш результатов парсеров
+
+    Свежие записи (моложе ttl) отдаются без обращения к сети.
+    Устаревшие не более чем на stale_ttl секунд отдаются сразу,
+    а обновление запускается в фоне (stale-while-revalidate).
+    """
+
+    def __init__(self, cache_dir: str = 'data/cache', ttl: int = 3600, stale_ttl: int = 600):
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.logger = logging.getLogger(__name__)
+
+        self._executor = ThreadPoolExecutor(max_workers=1)
+        self._refreshing = set()
+        self._lock = threading.Lock()
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def get_or_fetch(self, key: str, fetch: Callable[[], List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+        """Возвращает данные из кэша или загружает их через fetch"""
+        entry = self._load(key)
+
+        if entry is not None:
+            age = time.time() - entry['stored_at']
+
+            if age < self.ttl:
+                self.logger.info(f"Кэш: {key} (возраст {int(age)}с)")
+                return entry['items']
+
+            if age < self.ttl + self.stale_ttl:
+                self.logger.info(f"Кэш: {key} устарел, обновляем в фоне")
+                self._revalidate(key, fetch)
+                return entry['items']
+
+        items = fetch()
+        self._store(key, items)
+        return items
+
+    def close(self):
+        """Дожидается завершения фоновых обновлений"""
+        self._executor.shutdown(wait=True)
+
+    def _revalidate(self, key: str, fetch: Callable[[], List[Dict[str, Any]]]):
+        """Запускает фоновое обновление записи, если оно еще не идет"""
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+
+        def refresh():
+            try:
+                self._store(key, fetch())
+            except Exception as e:
+                self.logger.error(f"Ошибка фонового обновления кэша {key}: {e}")
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        self._executor.submit(refresh)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key.replace(':', '_') + '.json')
+
+    def _load(self, key: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self._path(key), 'rb') as f:
+                return _decode_value(json_utils.loads(f.read()))
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            self.logger.warning(f"Не удалось прочитать кэш {key}: {e}")
+            return None
+
+    def _store(self, key: str, items: List[Dict[str, Any]]):
+        path = self._path(key)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, 'wb') as f:
+                f.write(json_utils.dumps({'stored_at': time.time(), 'items': items}, default=_encode_value))
+            os.replace(tmp_path, path)
+        except Exception as e:
+            self.logger.warning(f"Не удалось сохранить кэш {key}: {e}")
+
+def _encode_value(value: Any) -> Any:
+    """Сериализует значения, которые json не умеет сохранять"""
+    if isinstance(value, datetime):
+        return {'__datetime__': value.isoformat()}
+    return str(value)
+
+def _decode_value(value: Any) -> Any:
+    """Восстанавливает значения, сохраненные через _encode_value"""
+    if isinstance(value, dict):
+        if '__datetime__' in value:
+            return datetime.fromisoformat(value['__datetime__'])
+        return {key: _decode_value(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_decode_value(item) for item in value]
+    return value
@@ -27,6 +27,26 @@ class Config:
     ENABLE_HACKERNEWS = os.getenv('ENABLE_HACKERNEWS', 'true').lower() == 'true'
     ENABLE_REDDIT = os.getenv('ENABLE_REDDIT', 'true').lower() == 'true'
     
+    # Параллельный сбор новостей
+    MAX_CONCURRENT_SOURCES = int(os.getenv('MAX_CONCURRENT_SOURCES', '5'))
+    MEMORY_LIMIT_MB = int(os.getenv('MEMORY_LIMIT_MB', '0'))  # 0 - без ограничения
+    
+    # Максимум новостей в дайджесте (0 - без ограничения)
+    MAX_DIGEST_ITEMS = int(os.getenv('MAX_DIGEST_ITEMS', '0'))
+    
+    # Кэш результатов парсеров
+    ENABLE_CACHE = os.getenv('ENABLE_CACHE', 'true').lower() == 'true'
+    CACHE_DIR = os.getenv('CACHE_DIR', 'data/cache')
+    CACHE_TTL = int(os.getenv('CACHE_TTL', '3600'))  # секунды
+    CACHE_STALE_TTL = int(os.getenv('CACHE_STALE_TTL', '600'))  # секунды
+    
+    # Не отправлять повторно новости из прошлых дайджестов
+    ENABLE_SEEN_URLS = os.getenv('ENABLE_SEEN_URLS', 'true').lower() == 'true'
+    SEEN_URLS_FILE = os.getenv('SEEN_URLS_FILE', 'data/seen_urls.bloom')
+    
+    # ID последних просмотренных твитов по каждому запросу
+    TWITTER_STATE_FILE = os.getenv('TWITTER_STATE_FILE', 'data/twitter_state.json')
+    
     # Логирование
     LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO')
     
@@ -35,7 +55,7 @@ class Config:
         "AI news", "artificial intelligence", "ChatGPT", "OpenAI", 
         "Claude", "Anthropic", "Gemini AI", "DeepMind", "Sora", 
         "Stable Diffusion", "Midjourney", "Runway AI", "text-to-video", 
-        "text-to-image", "LLM", "AI", "OpenAI", "Anthropic", "Google", "DeepMind",
+        "text-to-image", "LLM", "AI", "Google",
         "Microsoft", "Meta", "NVIDIA", "Adobe", "Stability AI", "Runway", "Jasper AI"
     ]
     
@@ -0,0 +1,54 @@
+import logging
+import os
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, Optional
+
+class MemoryAdaptiveDispatcher:
+    """Выполняет задачи в пуле потоков, снижая параллелизм при нехватке памяти
+
+    Пока RSS процесса выше memory_threshold_mb, новые задачи не запускаются
+    до завершения уже работающих. Если не запущено ни одной задачи,
+    очередная все равно стартует, чтобы работа не остановилась.
+    memory_threshold_mb = 0 отключает контроль памяти.
+    """
+
+    def __init__(self, max_concurrency: int = 5, memory_threshold_mb: int = 0):
+        self.max_concurrency = max(max_concurrency, 1)
+        self.memory_threshold_mb = memory_threshold_mb
+        self.logger = logging.getLogger(__name__)
+
+    def run_many(self, tasks: Dict[str, Callable[[], Any]]) -> Dict[str, Future]:
+        """Выполняет задачи и возвращает их Future по тем же ключам"""
+        futures = {}
+        running = set()
+
+        with ThreadPoolExecutor(max_workers=self.max_concurrency) as executor:
+            for name, task in tasks.items():
+                while running and (len(running) >= self.max_concurrency or self._memory_exceeded()):
+                    _, running = wait(running, return_when=FIRST_COMPLETED)
+
+                future = executor.submit(task)
+                futures[name] = future
+                running.add(future)
+
+        return futures
+
+    def _memory_exceeded(self) -> bool:
+        if not self.memory_threshold_mb:
+            return False
+
+        rss_mb = _current_rss_mb()
+        if rss_mb is not None and rss_mb > self.memory_threshold_mb:
+            self.logger.warning(f"RSS {rss_mb:.0f} МБ выше порога {self.memory_threshold_mb} МБ, ждем завершения задач")
+            return True
+
+        return False
+
+def _current_rss_mb() -> Optional[float]:
+    """Возвращает текущий RSS процесса в МБ (только Linux)"""
+    try:
+        with open('/proc/self/statm') as f:
+            resident_pages = int(f.read().split()[1])
+        return resident_pages * os.sysconf('SC_PAGE_SIZE') / (1024 * 1024)
+    except (OSError, ValueError, IndexError):
+        return None
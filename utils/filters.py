@@ -1,13 +1,57 @@
+import operator
 import re
-from datetime import datetime, timedelta
-from typing import List, Dict, Any
+from functools import lru_cache
+from datetime import datetime, timedelta, timezone
+from typing import List, Dict, Any, Iterable, Tuple
 from utils.config import Config
+from utils.keyword_matcher import KeywordMatcher
+
+# Веса ключевых слов для оценки релевантности
+_RELEVANCE_WEIGHTS = tuple(
+    # Базовые ключевые слова (высокий приоритет)
+    [(keyword, 20) for keyword in ("chatgpt", "openai", "claude", "gemini", "sora", "gpt-4", "gpt-5")] +
+    # Средние ключевые слова
+    [(keyword, 10) for keyword in ("ai", "artificial intelligence", "stable diffusion", "midjourney")] +
+    # Низкие ключевые слова
+    [(keyword, 5) for keyword in ("machine learning", "deep learning", "neural network")]
+)
+
+# Все, кроме букв и цифр, при сравнении заголовков на дубликаты
+_TITLE_NOISE_RE = re.compile(r'[\W_]+')
+
+# Символы для определения языка заголовка
+_CYRILLIC_RE = re.compile(r'[а-яё]')
+_LATIN_RE = re.compile(r'[a-z]')
+# Нежелательные символы (японские, китайские, арабские и т.д.)
+_UNWANTED_CHARS_RE = re.compile(r'[^\w\s\-.,!?()\[\]":;@#$%^&*+=<>/\\|`~]')
+
+# Эмодзи для типов контента Reddit
+_CONTENT_TYPE_EMOJI = {
+    'image': '🖼️',
+    'video': '🎥',
+    'text': '📝',
+    'link': '🔗'
+}
+
+# Шаблон строки новости в дайджесте Telegram
+_NEWS_ITEM_TEMPLATE = "🔹 {emoji}<a href='{url}'>{title}</a>{duration}\nИсточник: {source}"
 
 class NewsFilter:
     """Класс для фильтрации новостей"""
     
     def __init__(self):
         self.config = Config()
+        
+        # Ключевые слова приводим к нижнему регистру один раз, а не при каждой проверке
+        self._keyword_pairs = tuple((keyword, keyword.lower()) for keyword in self.config.AI_KEYWORDS)
+        self._ai_matcher = KeywordMatcher(keyword.lower() for keyword in self.config.AI_KEYWORDS)
+        self._exclude_matcher = KeywordMatcher(keyword.lower() for keyword in self.config.EXCLUDE_KEYWORDS)
+        self._relevance_weights = dict(_RELEVANCE_WEIGHTS)
+        self._relevance_matcher = KeywordMatcher(self._relevance_weights)
+        
+        # Одни и те же заголовки приходят по разным ключевым словам и регионам,
+        # поэтому результат поиска ключевых слов кэшируем по тексту
+        self._find_keywords = lru_cache(maxsize=8192)(self._find_keywords_uncached)
     
     def is_recent_news(self, published_date: datetime, hours: int = 24) -> bool:
         """Проверяет, является ли новость свежей (за последние N часов)"""
@@ -15,7 +59,6 @@ class NewsFilter:
             return False
         
         # Получаем текущее время с учетом часового пояса
-        from datetime import timezone
         now = datetime.now(timezone.utc)
         cutoff_time = now - timedelta(hours=hours)
         
@@ -27,71 +70,65 @@ class NewsFilter:
     
     def contains_ai_keywords(self, text: str) -> bool:
         """Проверяет, содержит ли текст ключевые слова об ИИ"""
-        if not text:
-            return False
+        return self.contains_ai_keywords_any(text)
+    
+    def contains_ai_keywords_any(self, *texts: str) -> bool:
+        """Проверяет несколько текстов (заголовок, описание) без их склеивания
         
-        text_lower = text.lower()
+        Ключевое слово об ИИ должно встретиться хотя бы в одном тексте,
+        исключаемые слова не должны встречаться ни в одном.
+        """
+        texts_lower = [text.lower() for text in texts if text]
         
-        # Проверяем наличие ключевых слов
-        has_ai_keywords = any(keyword.lower() in text_lower for keyword in self.config.AI_KEYWORDS)
+        # Проверяем наличие ключевых слов; обычно они находятся уже в заголовке
+        if not any(self._ai_matcher.search_any(text_lower) for text_lower in texts_lower):
+            return False
         
         # Проверяем отсутствие исключаемых слов
-        has_exclude_keywords = any(keyword.lower() in text_lower for keyword in self.config.EXCLUDE_KEYWORDS)
-        
-        return has_ai_keywords and not has_exclude_keywords
+        return not any(self._exclude_matcher.search_any(text_lower) for text_lower in texts_lower)
     
     def is_retweet(self, text: str) -> bool:
         """Проверяет, является ли твит ретвитом"""
-        return text.startswith('RT @') or text.startswith('rt @')
+        return text.startswith(('RT @', 'rt @'))
     
     def clean_text(self, text: str) -> str:
         """Очищает текст от лишних символов"""
         if not text:
             return ""
         
-        # Удаляем лишние пробелы и переносы строк
-        text = re.sub(r'\s+', ' ', text)
-        text = text.strip()
-        
-        return text
+        # Удаляем лишние пробелы и переносы строк (split() без аргументов заодно убирает их по краям)
+        return ' '.join(text.split())
     
     def extract_keywords_from_text(self, text: str) -> List[str]:
         """Извлекает ключевые слова из текста"""
         if not text:
             return []
         
-        text_lower = text.lower()
-        found_keywords = []
-        
-        for keyword in self.config.AI_KEYWORDS:
-            if keyword.lower() in text_lower:
-                found_keywords.append(keyword)
-        
-        return found_keywords
+        return list(self._find_keywords(text))
+    
+    def _find_keywords_uncached(self, text: str) -> Tuple[str, ...]:
+        found = self._ai_matcher.find_all(text.lower())
+        return tuple(keyword for keyword, keyword_lower in self._keyword_pairs if keyword_lower in found)
     
     def is_english_or_russian(self, text: str) -> bool:
         """Проверяет, является ли текст на английском или русском языке"""
         if not text:
             return False
         
-        # Подсчитываем количество символов разных алфавитов
-        cyrillic_count = len(re.findall(r'[а-яё]', text.lower()))
-        latin_count = len(re.findall(r'[a-z]', text.lower()))
+        # Нежелательные символы (японские, китайские, арабские и т.д.) исключают текст сразу,
+        # поэтому достаточно найти первый, а не считать все
+        if _UNWANTED_CHARS_RE.search(text):
+            return False
         
-        # Подсчитываем нежелательные символы (японские, китайские, арабские и т.д.)
-        unwanted_chars = len(re.findall(r'[^\w\s\-.,!?()\[\]":;@#$%^&*+=<>/\\|`~]', text))
+        # Подсчитываем количество символов разных алфавитов
+        text_lower = text.lower()
+        cyrillic_count = len(_CYRILLIC_RE.findall(text_lower))
+        latin_count = len(_LATIN_RE.findall(text_lower))
         
-        # Подсчитываем общее количество значимых символов
         total_letters = cyrillic_count + latin_count
-        total_chars = len(re.findall(r'[^\s]', text))  # Все не-пробельные символы
-        
         if total_letters == 0:
             return False
         
-        # Если есть нежелательные символы - исключаем
-        if unwanted_chars > 0:
-            return False
-        
         # Если больше 80% символов кириллицы или латиницы - считаем подходящим
         cyrillic_ratio = cyrillic_count / total_letters
         latin_ratio = latin_count / total_letters
@@ -104,26 +141,10 @@ class NewsFilter:
         if not title:
             return 0
         
-        score = 0
         text = f"{title} {description}".lower()
         
-        # Базовые ключевые слова (высокий приоритет)
-        high_priority = ["chatgpt", "openai", "claude", "gemini", "sora", "gpt-4", "gpt-5"]
-        for keyword in high_priority:
-            if keyword in text:
-                score += 20
-        
-        # Средние ключевые слова
-        medium_priority = ["ai", "artificial intelligence", "stable diffusion", "midjourney"]
-        for keyword in medium_priority:
-            if keyword in text:
-                score += 10
-        
-        # Низкие ключевые слова
-        low_priority = ["machine learning", "deep learning", "neural network"]
-        for keyword in low_priority:
-            if keyword in text:
-                score += 5
+        # Каждое найденное слово учитывается один раз со своим весом
+        score = sum(self._relevance_weights[keyword] for keyword in self._relevance_matcher.find_all(text))
         
         # Бонус за количество найденных ключевых слов
         if keywords:
@@ -131,38 +152,40 @@ class NewsFilter:
         
         return min(score, 100)
     
+    def _score_news(self, news: Dict[str, Any]) -> int:
+        """Вычисляет релевантность новости, -1 если язык не подходит"""
+        title = news.get('title', '')
+        
+        # Проверяем язык заголовка
+        if not self.is_english_or_russian(title):
+            return -1
+        
+        return self.calculate_relevance_score(title, news.get('description', ''), news.get('keywords', []))
+    
     def filter_news_by_relevance(self, news_list: List[Dict[str, Any]], min_score: int = 30) -> List[Dict[str, Any]]:
         """Фильтрует новости по релевантности и языку"""
         filtered_news = []
         
         for news in news_list:
-            title = news.get('title', '')
-            description = news.get('description', '')
-            keywords = news.get('keywords', [])
-            
-            # Проверяем язык заголовка
-            if not self.is_english_or_russian(title):
-                continue
-            
-            score = self.calculate_relevance_score(title, description, keywords)
+            score = self._score_news(news)
             
             if score >= min_score:
                 news['relevance_score'] = score
                 filtered_news.append(news)
         
-        # Сортируем по релевантности
-        filtered_news.sort(key=lambda x: x.get('relevance_score', 0), reverse=True)
+        # Сортируем по релевантности (relevance_score только что заполнен у каждой новости)
+        filtered_news.sort(key=operator.itemgetter('relevance_score'), reverse=True)
         
         return filtered_news
     
-    def remove_duplicates(self, news_list: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-        """Удаляет дубликаты новостей"""
+    def remove_duplicates(self, news_list: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Удаляет дубликаты новостей (принимает любой итерируемый источник за один проход)"""
         seen_titles = set()
         seen_urls = set()
         unique_news = []
         
         for news in news_list:
-            title = news.get('title', '').lower().strip()
+            title = _title_key(news.get('title', ''))
             url = news.get('url', '')
             
             # Проверяем дубликаты по заголовку и URL
@@ -173,6 +196,15 @@ class NewsFilter:
         
         return unique_news
     
+    def deduplicate_and_filter(self, news_list: Iterable[Dict[str, Any]], min_score: int = 30) -> List[Dict[str, Any]]:
+        """Удаляет дубликаты и фильтрует по релевантности
+        
+        Дубликатами считаются новости с одинаковым заголовком (без учета регистра,
+        пунктуации и пробелов) или URL; из дубликатов остается первая новость.
+        Результат отсортирован по релевантности, как в filter_news_by_relevance.
+        """
+        return self.filter_news_by_relevance(self.remove_duplicates(news_list), min_score)
+    
     def format_news_for_telegram(self, news_list: List[Dict[str, Any]], max_items: int = 20) -> str:
         """Форматирует новости для отправки в Telegram"""
         if not news_list:
@@ -182,7 +214,6 @@ class NewsFilter:
         news_list = news_list[:max_items]
         
         # Получаем текущую дату
-        from datetime import timezone
         current_date = datetime.now(timezone.utc).strftime("%d %B %Y")
         
         # Формируем заголовок
@@ -202,30 +233,32 @@ class NewsFilter:
             # Добавляем эмодзи для типа контента Reddit
             content_emoji = ""
             if 'Reddit' in source and content_type:
-                emoji_map = {
-                    'image': '🖼️',
-                    'video': '🎥', 
-                    'text': '📝',
-                    'link': '🔗'
-                }
-                content_emoji = emoji_map.get(content_type, '📄')
+                content_emoji = _CONTENT_TYPE_EMOJI.get(content_type, '📄')
             
             # Добавляем длительность для YouTube видео
             duration_info = ""
             if 'YouTube' in source and duration > 0:
-                minutes = duration // 60
-                seconds = duration % 60
+                minutes, seconds = divmod(duration, 60)
                 if minutes > 0:
                     duration_info = f" ({minutes}м {seconds}с)"
                 else:
                     duration_info = f" ({seconds}с)"
             
             # Формируем строку с учетом типа контента и длительности
-            if content_emoji:
-                news_item = f"🔹 {content_emoji} <a href='{url}'>{title}</a>{duration_info}\nИсточник: {source}"
-            else:
-                news_item = f"🔹 <a href='{url}'>{title}</a>{duration_info}\nИсточник: {source}"
-            
-            news_items.append(news_item)
+            news_items.append(_NEWS_ITEM_TEMPLATE.format(
+                emoji=f"{content_emoji} " if content_emoji else "",
+                url=url,
+                title=title,
+                duration=duration_info,
+                source=source
+            ))
         
         return header + "\n".join(news_items)
+
+def _title_key(title: str) -> str:
+    """Нормализует заголовок для поиска дубликатов
+    
+    Перепечатки одной новости часто отличаются только регистром, кавычками,
+    тире или пробелами, поэтому сравниваются только буквы и цифры.
+    """
+    return _TITLE_NOISE_RE.sub(' ', title.lower()).strip()
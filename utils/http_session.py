@@ -0,0 +1,25 @@
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+def create_http_session(pool_connections: int = 20, pool_maxsize: int = 5) -> requests.Session:
+    """Создает HTTP сессию с пулом keep-alive соединений
+
+    pool_connections - сколько хостов держать в пуле,
+    pool_maxsize - сколько соединений держать на один хост.
+    Ответы 429/503 повторяются до 3 раз с экспоненциальной задержкой
+    с учетом заголовка Retry-After.
+    """
+    retry = Retry(
+        total=3,
+        status_forcelist=(429, 503),
+        backoff_factor=1,
+        respect_retry_after_header=True,
+        raise_on_status=False
+    )
+
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize, max_retries=retry)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
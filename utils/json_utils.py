@@ -0,0 +1,23 @@
+import json
+from typing import Any, Callable, Optional
+
+try:
+    import orjson
+except ImportError:  # orjson необязателен, используем стандартный json
+    orjson = None
+
+def dumps(obj: Any, default: Optional[Callable[[Any], Any]] = None) -> bytes:
+    """Сериализует объект в JSON (UTF-8)
+
+    datetime всегда передается в default, чтобы формат не зависел
+    от того, установлен ли orjson.
+    """
+    if orjson is not None:
+        return orjson.dumps(obj, default=default, option=orjson.OPT_PASSTHROUGH_DATETIME)
+    return json.dumps(obj, default=default, ensure_ascii=False).encode('utf-8')
+
+def loads(data: bytes) -> Any:
+    """Разбирает JSON из bytes или str"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
@@ -0,0 +1,42 @@
+from typing import Iterable, Set
+
+try:
+    import ahocorasick
+except ImportError:  # pyahocorasick необязателен, проверяем подстроки по одной
+    ahocorasick = None
+
+class KeywordMatcher:
+    """Поиск набора ключевых слов в тексте
+
+    С pyahocorasick текст просматривается один раз автоматом Ахо-Корасик,
+    без него каждое слово проверяется через `in`.
+    Ключевые слова и текст передаются в нижнем регистре.
+    """
+
+    def __init__(self, keywords: Iterable[str]):
+        # Короткие и частые слова ("ai") первыми, чтобы any() завершался раньше
+        self.keywords = tuple(sorted(set(keywords), key=len))
+        self._automaton = None
+
+        if ahocorasick is not None and self.keywords:
+            automaton = ahocorasick.Automaton()
+            for keyword in self.keywords:
+                automaton.add_word(keyword, keyword)
+            automaton.make_automaton()
+            self._automaton = automaton
+
+    def search_any(self, text: str) -> bool:
+        """Есть ли в тексте хотя бы одно ключевое слово"""
+        if self._automaton is not None:
+            for _ in self._automaton.iter(text):
+                return True
+            return False
+
+        return any(keyword in text for keyword in self.keywords)
+
+    def find_all(self, text: str) -> Set[str]:
+        """Возвращает все ключевые слова, встречающиеся в тексте"""
+        if self._automaton is not None:
+            return {keyword for _, keyword in self._automaton.iter(text)}
+
+        return {keyword for keyword in self.keywords if keyword in text}
@@ -0,0 +1,39 @@
+import threading
+import time
+
+class RateLimiter:
+    """Потокобезопасный ограничитель частоты запросов (token bucket)
+
+    Допускает не более max_calls вызовов за period секунд,
+    кратковременные всплески ограничены тем же max_calls.
+    """
+
+    def __init__(self, max_calls: int, period: float = 1.0):
+        self.capacity = max_calls
+        self.rate = max_calls / period
+        self._tokens = float(max_calls)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Блокирует поток, пока не освободится токен"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+
+                wait = (1 - self._tokens) / self.rate
+
+            time.sleep(wait)
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
@@ -57,22 +57,27 @@ class TelegramSender:
     def _split_message(self, message: str, max_length: int) -> list:
         """Разбивает сообщение на части"""
         parts = []
-        lines = message.split('\n')
-        current_part = ""
+        # Строки части копим в списке и склеиваем один раз, а длину считаем на ходу
+        current_lines = []
+        current_length = 0
         
-        for line in lines:
+        for line in message.split('\n'):
+            line_length = len(line) + 1  # вместе с переводом строки
+            
             # Если добавление строки не превысит лимит
-            if len(current_part + line + '\n') <= max_length:
-                current_part += line + '\n'
+            if current_length + line_length <= max_length:
+                current_lines.append(line)
+                current_length += line_length
             else:
                 # Сохраняем текущую часть и начинаем новую
-                if current_part:
-                    parts.append(current_part.strip())
-                current_part = line + '\n'
+                if current_lines:
+                    parts.append('\n'.join(current_lines).strip())
+                current_lines = [line]
+                current_length = line_length
         
         # Добавляем последнюю часть
-        if current_part:
-            parts.append(current_part.strip())
+        if current_lines:
+            parts.append('\n'.join(current_lines).strip())
         
         return parts
     
@@ -88,13 +93,14 @@ class TelegramSender:
     
     def send_summary(self, news_count: int, sources_used: list, errors: list = None) -> bool:
         """Отправляет сводку о работе агрегатора"""
-        summary = f"📊 *Сводка работы AI News Aggregator*\n\n"
-        summary += f"📰 Найдено новостей: {news_count}\n"
-        summary += f"🔍 Источники: {', '.join(sources_used)}\n"
+        lines = [
+            "📊 *Сводка работы AI News Aggregator*\n",
+            f"📰 Найдено новостей: {news_count}",
+            f"🔍 Источники: {', '.join(sources_used)}"
+        ]
         
         if errors:
-            summary += f"\n⚠️ Ошибки: {len(errors)}\n"
-            for error in errors[:3]:  # Показываем только первые 3 ошибки
-                summary += f"• {error}\n"
+            lines.append(f"\n⚠️ Ошибки: {len(errors)}")
+            lines.extend(f"• {error}" for error in errors[:3])  # Показываем только первые 3 ошибки
         
-        return self.send_message(summary)
+        return self.send_message("\n".join(lines) + "\n")